@@ -0,0 +1,442 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from candidates import CandidateSet
+from codes import code_count, decode, decode_many
+from judge import Judge
+from player import AutoPlayer, MinimaxPlayer, SolverPlayer, make_auto_player
+from simulate import play_game, simulate
+
+# (n, k) pairs measured when no grid is given
+DEFAULT_GRID = [(3, 4), (4, 6), (5, 8)]
+
+# Relative growth of the time per operation reported as a regression
+DEFAULT_THRESHOLD = 0.25
+
+# Number of pairs scored by one call of the batch benchmark
+BATCH_SIZE = 1 << 14
+
+# Baseline stored next to this file by --save-baseline
+DEFAULT_BASELINE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmark-baseline.json"
+)
+
+BENCHMARKS = {}
+
+
+def register_benchmark(name):
+    """
+    Decorator adding a benchmark to `BENCHMARKS`.
+
+    A benchmark receives (n, k, rng) and returns (func, ops): a callable to time and
+    the number of operations one call performs, or None if it does not support the
+    code space. Setup work done before returning is not timed.
+
+    Args:
+        name (str): Name used to select the benchmark and to label its results.
+
+    Returns:
+        callable: The decorator.
+    """
+
+    def decorator(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return decorator
+
+
+def _solver(n, k):
+    # Measure the search itself: a compiled decision tree would skip it
+    if MinimaxPlayer.supports(n, k):
+        return MinimaxPlayer()
+    return make_auto_player(n, k)
+
+
+def _legacy_check(k, hidden, query):
+    # The scoring of `Judge.check` before the counting kernel, kept for comparison:
+    # it counts every color shared by the unmatched positions only once
+    if any(x < 1 or x > k for x in hidden + query):
+        raise ValueError(f"All numbers must be between 1 and {k}")
+    correct_position_and_color = sum(h == q for h, q in zip(hidden, query))
+    hidden_remaining = set([h for h, q in zip(hidden, query) if h != q])
+    query_remaining = set([q for h, q in zip(hidden, query) if h != q])
+    correct_color = 0
+    for color in query_remaining:
+        if color in hidden_remaining:
+            correct_color += 1
+    return correct_position_and_color, correct_color
+
+
+def _legacy_score(k, hidden, query):
+    # The batch scoring of `Judge._score` before the counting kernel
+    unmatched = hidden != query
+    correct_position_and_color = (~unmatched).sum(axis=-1)
+    correct_color = np.zeros_like(correct_position_and_color)
+    for color in range(1, k + 1):
+        in_hidden = ((hidden == color) & unmatched).any(axis=-1)
+        in_query = ((query == color) & unmatched).any(axis=-1)
+        correct_color += in_hidden & in_query
+    return correct_position_and_color, correct_color
+
+
+def _random_pairs(n, k, rng, count=1000):
+    return [
+        ([rng.randint(1, k) for _ in range(n)], [rng.randint(1, k) for _ in range(n)])
+        for _ in range(count)
+    ]
+
+
+@register_benchmark("judge.check")
+def bench_check(n, k, rng):
+    """Scores single (hidden, query) pairs."""
+    pairs = _random_pairs(n, k, rng)
+
+    def run():
+        for hidden, query in pairs:
+            Judge.check(k, hidden, query)
+
+    return run, len(pairs)
+
+
+@register_benchmark("judge.score")
+def bench_score(n, k, rng):
+    """Scores single pairs with the counting kernel, reusing one count array."""
+    pairs = _random_pairs(n, k, rng)
+    counts = [0] * (k + 1)
+
+    def run():
+        for hidden, query in pairs:
+            Judge.score(k, hidden, query, counts)
+
+    return run, len(pairs)
+
+
+@register_benchmark("judge.check.legacy")
+def bench_check_legacy(n, k, rng):
+    """Scores single pairs with the set-based scoring replaced by `Judge.score`."""
+    pairs = _random_pairs(n, k, rng)
+
+    def run():
+        for hidden, query in pairs:
+            _legacy_check(k, hidden, query)
+
+    return run, len(pairs)
+
+
+def _batch(n, k, rng):
+    count = code_count(n, k)
+    indices = np.array([rng.randrange(count) for _ in range(BATCH_SIZE)])
+    return decode_many(indices, n, k), decode(rng.randrange(count), n, k)
+
+
+@register_benchmark("judge.check_many")
+def bench_check_many(n, k, rng):
+    """Scores one query against a batch of hidden codes."""
+    candidates, query = _batch(n, k, rng)
+
+    def run():
+        Judge.check_many(k, candidates, query)
+
+    return run, BATCH_SIZE
+
+
+@register_benchmark("judge.check_many.legacy")
+def bench_check_many_legacy(n, k, rng):
+    """Scores a batch with the per-color presence test replaced by `Judge._score`."""
+    candidates, query = _batch(n, k, rng)
+    query = np.asarray(query).reshape(1, -1)
+
+    def run():
+        _legacy_score(k, candidates, query)
+
+    return run, BATCH_SIZE
+
+
+@register_benchmark("candidates.apply")
+def bench_apply(n, k, rng):
+    """Filters the whole code space by one feedback, then undoes it."""
+    if code_count(n, k) > SolverPlayer.MAX_CODES:
+        return None
+    candidates = CandidateSet(n, k)
+    hidden = decode(rng.randrange(code_count(n, k)), n, k)
+    query = decode(rng.randrange(code_count(n, k)), n, k)
+    feedback = Judge.check(k, hidden, query)
+
+    def run():
+        candidates.apply(query, *feedback)
+        candidates.undo()
+
+    return run, 1
+
+
+@register_benchmark("random.move")
+def bench_random_move(n, k, rng):
+    """Draws unused queries from `AutoPlayer`."""
+    moves = min(100, code_count(n, k))
+
+    def run():
+        player = AutoPlayer()
+        for _ in range(moves):
+            player.get_query(n, k)
+
+    return run, moves
+
+
+@register_benchmark("solver.move")
+def bench_solver_move(n, k, rng):
+    """Plays one game with a solver player; ops are its moves."""
+    hidden = decode(rng.randrange(code_count(n, k)), n, k)
+    seed = rng.randrange(1 << 16)
+    moves = []
+
+    def run():
+        # Reseed so every call plays the same game, even for randomized players
+        random.seed(seed)
+        turns, _ = play_game(n, k, hidden, _solver(n, k))
+        moves.append(turns)
+
+    # The number of moves is only known once the game is played
+    run()
+    return run, moves[0]
+
+
+@register_benchmark("simulate")
+def bench_simulate(n, k, rng):
+    """Runs a small headless simulation; ops are games."""
+    games = 4
+    seed = rng.randrange(1 << 16)
+
+    def run():
+        simulate(n, k, lambda: _solver(n, k), sample=games, seed=seed)
+
+    return run, games
+
+
+def measure(func, ops, repeat=3, min_time=0.2):
+    """
+    Times a benchmark callable.
+
+    Every repeat calls `func` until at least `min_time` seconds have passed; the best
+    repeat is kept, as it is the least disturbed by the rest of the machine.
+
+    Args:
+        func (callable): The code to time.
+        ops (int): Number of operations performed by one call.
+        repeat (int, optional): Number of repeats. Defaults to 3.
+        min_time (float, optional): Minimum duration of a repeat, in seconds.
+
+    Returns:
+        float: Best time per operation, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / (calls * ops))
+    return best
+
+
+def run_benchmarks(grid=None, names=None, seed=0, repeat=3, min_time=0.2):
+    """
+    Runs the selected benchmarks over a grid of code spaces.
+
+    Args:
+        grid (list, optional): (n, k) pairs. Defaults to `DEFAULT_GRID`.
+        names (list, optional): Benchmark names. Defaults to all of them.
+        seed (int, optional): Seed for the inputs, so runs are comparable.
+        repeat (int, optional): Number of repeats per measurement.
+        min_time (float, optional): Minimum duration of a repeat, in seconds.
+
+    Returns:
+        list: One dict per measurement with keys "name", "n", "k", "ops" and "seconds"
+            (best time per operation).
+
+    Raises:
+        ValueError: If a benchmark name is unknown.
+    """
+    grid = DEFAULT_GRID if grid is None else grid
+    names = list(BENCHMARKS) if names is None else names
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    results = []
+    for n, k in grid:
+        for name in names:
+            rng = random.Random(f"{seed}-{name}-{n}-{k}")
+            random.seed(f"{seed}-{name}-{n}-{k}")
+            setup = BENCHMARKS[name](n, k, rng)
+            if setup is None:
+                continue
+            func, ops = setup
+            seconds = measure(func, ops, repeat, min_time)
+            results.append(
+                {"name": name, "n": n, "k": k, "ops": ops, "seconds": seconds}
+            )
+    return results
+
+
+def environment():
+    """
+    Describes the machine the benchmarks ran on.
+
+    Returns:
+        dict: Python, NumPy and platform versions.
+    """
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compares results with a baseline run.
+
+    Args:
+        results (list): Measurements as returned by `run_benchmarks`.
+        baseline (list): Measurements of the baseline run.
+        threshold (float, optional): Relative slowdown tolerated before a measurement
+            counts as a regression. Defaults to `DEFAULT_THRESHOLD`.
+
+    Returns:
+        list: One dict per measurement present in both runs with keys "name", "n",
+            "k", "baseline", "seconds", "ratio" and "regression".
+    """
+    previous = {(entry["name"], entry["n"], entry["k"]): entry for entry in baseline}
+    rows = []
+    for entry in results:
+        old = previous.get((entry["name"], entry["n"], entry["k"]))
+        if old is None:
+            continue
+        ratio = entry["seconds"] / old["seconds"]
+        rows.append(
+            {
+                "name": entry["name"],
+                "n": entry["n"],
+                "k": entry["k"],
+                "baseline": old["seconds"],
+                "seconds": entry["seconds"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+    return rows
+
+
+def format_results(results, comparison=None):
+    """
+    Formats measurements as a text table.
+
+    Args:
+        results (list): Measurements as returned by `run_benchmarks`.
+        comparison (list, optional): Rows returned by `compare`.
+
+    Returns:
+        str: The table.
+    """
+    compared = {(row["name"], row["n"], row["k"]): row for row in comparison or []}
+    lines = [
+        f"{'benchmark':<24} {'n':>3} {'k':>3} {'time/op':>12} {'ops/s':>12}  baseline"
+    ]
+    for entry in results:
+        row = compared.get((entry["name"], entry["n"], entry["k"]))
+        change = ""
+        if row is not None:
+            change = f"{row['ratio']:.2f}x"
+            if row["regression"]:
+                change += "  REGRESSION"
+        lines.append(
+            f"{entry['name']:<24} {entry['n']:>3} {entry['k']:>3} "
+            f"{entry['seconds'] * 1e6:>10.2f}us {1 / entry['seconds']:>12.0f}  {change}"
+        )
+    return "\n".join(lines)
+
+
+def _parse_space(value):
+    n, _, k = value.partition("x")
+    try:
+        return int(n), int(k)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'expected NxK, got "{value}"')
+
+
+def main():
+    """
+    Command-line entry point for the benchmarks.
+
+    Exits with status 1 when a measurement regressed against the baseline.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Mastermind components."
+    )
+    parser.add_argument(
+        "--grid", type=_parse_space, nargs="+", help="code spaces as NxK, e.g. 4x6 5x8"
+    )
+    parser.add_argument(
+        "--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed for the inputs")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--min-time", type=float, default=0.2, help="minimum seconds per repeat"
+    )
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--baseline", default=DEFAULT_BASELINE, help="JSON file to compare against"
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store the results as the baseline"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative slowdown reported as a regression",
+    )
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args()
+
+    results = run_benchmarks(
+        args.grid, args.only, args.seed, args.repeat, args.min_time
+    )
+    document = {"environment": environment(), "results": results}
+
+    comparison = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            comparison = compare(results, json.load(f)["results"], args.threshold)
+        document["comparison"] = comparison
+
+    for path in [args.output, args.baseline if args.save_baseline else None]:
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(document, f, indent=2)
+
+    if args.json:
+        print(json.dumps(document, indent=2))
+    else:
+        print(format_results(results, comparison))
+
+    if comparison is not None and any(row["regression"] for row in comparison):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
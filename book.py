@@ -0,0 +1,301 @@
+import argparse
+import glob
+import os
+import struct
+
+import numpy as np
+
+from codes import QueryHistory
+from feedback import FORMAT_VERSION as FEEDBACK_VERSION
+from feedback import (
+    FeedbackTable,
+    decode_feedback,
+    default_cache_dir,
+    encode_feedback,
+    outcome_count,
+)
+from player import SolverPlayer
+from symmetry import SymmetryTracker
+
+# Bump whenever the file layout changes so stale books are recompiled
+BOOK_VERSION = 2
+
+MAGIC = b"MMBOOK"
+
+# Longest strategy name a tree file holds, in UTF-8 bytes
+STRATEGY_BYTES = 32
+
+# magic, book version, feedback version, n, k, plies (0 for a full tree), strategy, nodes
+HEADER = struct.Struct(f"<6sHHHHH{STRATEGY_BYTES}sI")
+
+
+class DecisionTree:
+    """
+    A solver strategy compiled into a tree of moves for a fixed (n, k).
+
+    Node 0 is the opening position. `guesses[node]` is the row index (into
+    `codes.all_codes(n, k)`) of the guess played at that node, and
+    `children[node, feedback]` is the node reached after the encoded feedback, or
+    -1 when the game ends or the tree was cut off there.
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        strategy (str): Name of the heuristic the tree was compiled from.
+        plies (int or None): Number of moves stored per path, None for a full tree.
+        guesses (numpy.ndarray): int32 guess per node.
+        children (numpy.ndarray): int32 array of shape (nodes, (n + 1) ** 2).
+        path (str or None): File the tree was loaded from or saved to.
+    """
+
+    def __init__(self, n, k, strategy, plies, guesses, children, path=None):
+        self.n = n
+        self.k = k
+        self.strategy = strategy
+        self.plies = plies
+        self.guesses = guesses
+        self.children = children
+        self.path = path
+
+    def __len__(self):
+        return len(self.guesses)
+
+    @classmethod
+    def compile(cls, n, k, strategy="minimax", plies=None, table=None):
+        """
+        Plays out the strategy for every feedback path and records its moves.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            strategy (str, optional): Name of a registered heuristic. Defaults to "minimax".
+            plies (int, optional): Only compile the first `plies` moves of every path.
+                Defaults to the full tree.
+            table (FeedbackTable, optional): Precomputed feedback used while compiling.
+
+        Returns:
+            DecisionTree: The compiled tree.
+
+        Raises:
+            ValueError: If the strategy is unknown or the code space is too large.
+        """
+        player = SolverPlayer(strategy, table)
+        player._reset(n, k)
+        win = encode_feedback(n, n, 0)
+
+        candidates = player.candidates
+        guesses = []
+        children = []
+
+        def visit(node, used, depth):
+            # Survivors are narrowed in place and restored with undo on the way back
+            player.used_queries = QueryHistory(n, k, used)
+            player.tracker = SymmetryTracker(n, k, used)
+            guess = player._choose_guess()
+            guesses[node] = guess
+
+            if plies is not None and depth + 1 >= plies:
+                return
+
+            outcomes = np.unique(candidates.feedback(guess)).tolist()
+            for observed in outcomes:
+                if observed == win:
+                    continue
+                children[node][observed] = new_node()
+            for observed in outcomes:
+                if observed == win:
+                    continue
+                candidates.apply(guess, *decode_feedback(n, observed))
+                visit(int(children[node][observed]), used + [guess], depth + 1)
+                candidates.undo()
+
+        def new_node():
+            guesses.append(-1)
+            children.append(np.full(outcome_count(n), -1, dtype=np.int32))
+            return len(guesses) - 1
+
+        visit(new_node(), [], 0)
+
+        return cls(
+            n,
+            k,
+            strategy,
+            plies,
+            np.array(guesses, dtype=np.int32),
+            np.array(children, dtype=np.int32),
+        )
+
+    @staticmethod
+    def path_for(n, k, strategy, plies=None, cache_dir=None):
+        """
+        Returns the file path of a compiled tree.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            strategy (str): Name of the heuristic.
+            plies (int, optional): Number of compiled moves, None for a full tree.
+            cache_dir (str, optional): Directory holding the trees. Defaults to `default_cache_dir()`.
+
+        Returns:
+            str: Path to the versioned tree file.
+        """
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        depth = "full" if plies is None else f"p{plies}"
+        return os.path.join(
+            cache_dir,
+            f"book-v{BOOK_VERSION}-f{FEEDBACK_VERSION}-n{n}-k{k}-{strategy}-{depth}.bin",
+        )
+
+    def save(self, path):
+        """
+        Writes the tree to a compact binary file.
+
+        The file holds a fixed-size header followed by the raw int32 guesses and
+        children arrays. It is written to a temporary file and renamed into place.
+
+        Args:
+            path (str): Destination file.
+
+        Raises:
+            ValueError: If the strategy name does not fit into the header.
+        """
+        strategy = self.strategy.encode()
+        if len(strategy) > STRATEGY_BYTES:
+            raise ValueError(
+                f"Strategy name {self.strategy!r} is longer than {STRATEGY_BYTES} bytes"
+            )
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC,
+                    BOOK_VERSION,
+                    FEEDBACK_VERSION,
+                    self.n,
+                    self.k,
+                    self.plies or 0,
+                    strategy,
+                    len(self.guesses),
+                )
+            )
+            f.write(self.guesses.astype("<i4").tobytes())
+            f.write(self.children.astype("<i4").tobytes())
+        os.replace(tmp_path, path)
+        self.path = path
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a tree written by `save`.
+
+        Args:
+            path (str): File to read.
+
+        Returns:
+            DecisionTree or None: The tree, or None if the file is missing or stale.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if len(data) < HEADER.size:
+            return None
+        magic, version, feedback_version, n, k, plies, strategy, nodes = (
+            HEADER.unpack_from(data)
+        )
+        if (magic, version, feedback_version) != (
+            MAGIC,
+            BOOK_VERSION,
+            FEEDBACK_VERSION,
+        ):
+            return None
+
+        outcomes = outcome_count(n)
+        if len(data) != HEADER.size + 4 * nodes * (1 + outcomes):
+            return None
+
+        guesses = np.frombuffer(data, "<i4", nodes, HEADER.size)
+        children = np.frombuffer(
+            data, "<i4", nodes * outcomes, HEADER.size + 4 * nodes
+        ).reshape(nodes, outcomes)
+        return cls(
+            n,
+            k,
+            strategy.rstrip(b"\0").decode(),
+            plies or None,
+            guesses,
+            children,
+            path,
+        )
+
+    @classmethod
+    def load_or_compile(cls, n, k, strategy="minimax", plies=None, cache_dir=None):
+        """
+        Loads a compiled tree from the cache, compiling and saving it first if needed.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            strategy (str, optional): Name of the heuristic. Defaults to "minimax".
+            plies (int, optional): Number of compiled moves, None for a full tree.
+            cache_dir (str, optional): Directory holding the trees and feedback tables.
+
+        Returns:
+            DecisionTree: The tree.
+        """
+        path = cls.path_for(n, k, strategy, plies, cache_dir)
+        tree = cls.load(path)
+        if tree is None:
+            table = FeedbackTable.load_or_build(n, k, cache_dir)
+            tree = cls.compile(n, k, strategy, plies, table)
+            tree.save(path)
+        return tree
+
+    @classmethod
+    def find(cls, n, k, strategy="minimax", cache_dir=None):
+        """
+        Loads the deepest tree already compiled for (n, k, strategy), if any.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            strategy (str, optional): Name of the heuristic. Defaults to "minimax".
+            cache_dir (str, optional): Directory holding the trees.
+
+        Returns:
+            DecisionTree or None: The full tree if cached, else the deepest partial one.
+        """
+        full = cls.load(cls.path_for(n, k, strategy, None, cache_dir))
+        if full is not None:
+            return full
+
+        pattern = cls.path_for(n, k, strategy, 0, cache_dir).replace("-p0.bin", "-p*.bin")
+        trees = [tree for tree in map(cls.load, glob.glob(pattern)) if tree is not None]
+        return max(trees, key=lambda tree: tree.plies, default=None)
+
+
+def main():
+    """
+    Command-line entry point that compiles a strategy into the cache.
+    """
+    parser = argparse.ArgumentParser(description="Compile a solver decision tree.")
+    parser.add_argument("-n", type=int, default=4, help="sequence length")
+    parser.add_argument("-k", type=int, default=6, help="number of colors")
+    parser.add_argument("--strategy", default="minimax", help="heuristic name")
+    parser.add_argument(
+        "--plies", type=int, help="only compile this many moves per path"
+    )
+    args = parser.parse_args()
+
+    tree = DecisionTree.load_or_compile(args.n, args.k, args.strategy, args.plies)
+    print(f"{len(tree)} nodes in {tree.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import itertools
+
+import numpy as np
+
+import instrumentation
+from codes import all_codes, code_count, encode
+from feedback import encode_feedback
+from judge import Judge
+
+# Upper bound on the number of codes held in memory by one chunk
+CHUNK_SIZE = 4096
+
+
+def propagate_domains(n, k, history):
+    """
+    Derives the colors each position can still hold from the feedback history.
+
+    A query with no exact match rules out its color at every position, a query
+    with no match at all rules out all of its colors everywhere, and a query whose
+    matches add up to n is a permutation of the code, which rules out every other
+    color.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        history (list): (query, correct_position_and_color, correct_color) tuples.
+
+    Returns:
+        list: For every position, the sorted list of colors it can still hold.
+    """
+    domains = [set(range(1, k + 1)) for _ in range(n)]
+    for query, correct_position_and_color, correct_color in history:
+        if correct_position_and_color == 0:
+            for position, color in enumerate(query):
+                domains[position].discard(color)
+        if correct_position_and_color + correct_color == 0:
+            for domain in domains:
+                domain.difference_update(query)
+        elif correct_position_and_color + correct_color == n:
+            for domain in domains:
+                domain.intersection_update(query)
+    return [sorted(domain) for domain in domains]
+
+
+def consistent_codes(n, k, history, chunk_size=CHUNK_SIZE, rng=None):
+    """
+    Lazily enumerates the codes consistent with every feedback in the history.
+
+    The positions are split into a prefix, enumerated depth-first, and a suffix small
+    enough to enumerate as one NumPy block of at most `chunk_size` codes. Prefixes are
+    pruned when some query can no longer reach its number of exact matches, or when
+    the colors the prefix shares with a query (counted with multiplicity) exceed its
+    total matches or cannot reach them with the positions left. Each surviving
+    prefix is completed with the whole suffix block and filtered with
+    `Judge.check_many`. Memory use is bounded by the chunk size, whatever k ** n is.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        history (list): (query, correct_position_and_color, correct_color) tuples.
+        chunk_size (int, optional): Maximum number of codes per chunk. Defaults to `CHUNK_SIZE`.
+        rng (random.Random, optional): Shuffles the color order of every position so
+            the enumeration starts at a random place. Defaults to lexicographic order.
+
+    Yields:
+        numpy.ndarray: Non-empty (m, n) uint8 arrays of consistent codes, m <= chunk_size.
+    """
+    domains = propagate_domains(n, k, history)
+    if any(not domain for domain in domains):
+        return
+    if rng is not None:
+        for domain in domains:
+            rng.shuffle(domain)
+
+    # Find the shortest prefix whose remaining positions fit into one chunk
+    split = n
+    size = 1
+    while split > 0 and size * len(domains[split - 1]) <= chunk_size:
+        split -= 1
+        size *= len(domains[split])
+
+    suffix = np.array(list(itertools.product(*domains[split:])), dtype=np.uint8)
+    suffix = suffix.reshape(size, n - split)
+    block = np.empty((size, n), dtype=np.uint8)
+    block[:, split:] = suffix
+
+    queries = [list(query) for query, _, _ in history]
+    exacts = [exact for _, exact, _ in history]
+    totals = [exact + color for _, exact, color in history]
+    # Occurrences of every color in each query, and those matched by the prefix so far
+    query_counts = [[query.count(color) for color in range(k + 1)] for query in queries]
+    prefix_counts = [[0] * (k + 1) for _ in queries]
+    shared = [0] * len(history)
+    # reachable[i][p]: exact matches query i can still gain at positions >= p
+    reachable = [
+        [
+            sum(query[j] in domains[j] for j in range(p, n))
+            for p in range(n + 1)
+        ]
+        for query in queries
+    ]
+
+    prefix = []
+    matches = [0] * len(history)
+
+    def extend(position):
+        if position == split:
+            block[:, :split] = prefix
+            keep = np.ones(size, dtype=bool)
+            for query, exact, color in history:
+                e, c = Judge.check_many(k, block, query)
+                keep &= (e == exact) & (c == color)
+            if keep.any():
+                yield block[keep]
+            return
+
+        left = n - position - 1
+        for color in domains[position]:
+            feasible = True
+            for i, query in enumerate(queries):
+                gained = matches[i] + (query[position] == color)
+                if gained > exacts[i] or gained + reachable[i][position + 1] < exacts[i]:
+                    feasible = False
+                    break
+                common = shared[i] + (prefix_counts[i][color] < query_counts[i][color])
+                if common > totals[i] or common + left < totals[i]:
+                    feasible = False
+                    break
+            if not feasible:
+                continue
+
+            prefix.append(color)
+            for i, query in enumerate(queries):
+                matches[i] += query[position] == color
+                shared[i] += prefix_counts[i][color] < query_counts[i][color]
+                prefix_counts[i][color] += 1
+            yield from extend(position + 1)
+            for i, query in enumerate(queries):
+                matches[i] -= query[position] == color
+                prefix_counts[i][color] -= 1
+                shared[i] -= prefix_counts[i][color] < query_counts[i][color]
+            prefix.pop()
+
+    yield from extend(0)
+
+
+class CandidateSet:
+    """
+    The codes of a fixed (n, k) still consistent with a feedback history.
+
+    Membership is a boolean mask over the packed code space. Each new feedback is
+    checked only against the current survivors, the codes it removes are kept on a
+    stack so the step can be undone (for tree search or what-if analysis), and the
+    number of survivors is maintained so `len` is O(1).
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        table (FeedbackTable or None): Precomputed feedback used instead of `Judge`.
+        mask (numpy.ndarray): True for every packed code still consistent.
+    """
+
+    def __init__(self, n, k, table=None):
+        """
+        Initializes the set with every code of the space.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            table (FeedbackTable, optional): Precomputed feedback for (n, k).
+        """
+        self.n = n
+        self.k = k
+        self.table = table
+        self.mask = np.ones(code_count(n, k), dtype=bool)
+        self.count = len(self.mask)
+        self.removed = []
+        self._survivors = None
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, code):
+        return bool(self.mask[encode(code, self.k)])
+
+    @property
+    def depth(self):
+        """int: Number of feedbacks applied and not undone."""
+        return len(self.removed)
+
+    def survivors(self):
+        """
+        Returns the packed codes still consistent, in increasing order.
+
+        Returns:
+            numpy.ndarray: The survivors; the array is cached and must not be modified.
+        """
+        if self._survivors is None:
+            self._survivors = np.flatnonzero(self.mask)
+        return self._survivors
+
+    def feedback(self, query):
+        """
+        Returns the encoded feedback of a query against every survivor.
+
+        Args:
+            query (list or int): The query, as a sequence or a packed code.
+
+        Returns:
+            numpy.ndarray: Encoded feedback, aligned with `survivors()`.
+        """
+        survivors = self.survivors()
+        query = encode(query, self.k)
+        if self.table is not None:
+            return self.table.matrix[query][survivors]
+
+        codes = all_codes(self.n, self.k)
+        exact, color = Judge.check_many(self.k, codes[survivors], codes[query])
+        return encode_feedback(self.n, exact, color)
+
+    def apply(self, query, correct_position_and_color, correct_color):
+        """
+        Removes the survivors that would not have produced the given feedback.
+
+        Args:
+            query (list or int): The query that was checked.
+            correct_position_and_color (int): Number of exact matches.
+            correct_color (int): Number of color matches (excluding position).
+
+        Returns:
+            int: The number of codes removed.
+        """
+        observed = encode_feedback(self.n, correct_position_and_color, correct_color)
+        survivors = self.survivors()
+        keep = self.feedback(query) == observed
+
+        removed = survivors[~keep]
+        self.mask[removed] = False
+        self.count -= len(removed)
+        self.removed.append(removed)
+        self._survivors = survivors[keep]
+        instrumentation.count("candidates.pruned", len(removed))
+        return len(removed)
+
+    def undo(self):
+        """
+        Restores the codes removed by the last `apply`.
+
+        Raises:
+            IndexError: If there is no feedback to undo.
+        """
+        removed = self.removed.pop()
+        self.mask[removed] = True
+        self.count += len(removed)
+        self._survivors = None
@@ -0,0 +1,366 @@
+import bisect
+import random
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+
+def code_count(n, k):
+    """
+    Returns the number of possible codes of length n over k colors.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+
+    Returns:
+        int: The size of the code space, k ** n.
+    """
+    return k**n
+
+
+@lru_cache(maxsize=8)
+def all_codes(n, k):
+    """
+    Enumerates every code of length n over k colors.
+
+    Row i of the result is the code whose base-k digits (most significant first)
+    are the digits of i, with colors numbered from 1. The same ordering is used for
+    the rows and columns of `feedback.FeedbackTable`, so a row index identifies a code.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+
+    Returns:
+        numpy.ndarray: A read-only (k ** n, n) uint8 array of codes.
+    """
+    index = np.arange(code_count(n, k), dtype=np.int64)
+    weights = k ** np.arange(n - 1, -1, -1, dtype=np.int64)
+    codes = (index[:, np.newaxis] // weights % k + 1).astype(np.uint8)
+    codes.setflags(write=False)
+    return codes
+
+
+def encode(code, k):
+    """
+    Packs a code into a single base-k integer.
+
+    The packed value of a code is also its row index in `all_codes(len(code), k)`.
+    Packed codes that are already integers are returned unchanged.
+
+    Args:
+        code (list or int): A sequence of colors in the range [1, k], or a packed code.
+        k (int): Number of colors.
+
+    Returns:
+        int: The packed code.
+    """
+    if isinstance(code, (int, np.integer)):
+        return int(code)
+
+    value = 0
+    for color in code:
+        value = value * k + int(color) - 1
+    return value
+
+
+def decode(value, n, k):
+    """
+    Unpacks a base-k integer produced by `encode` back into a list of colors.
+
+    Args:
+        value (int): The packed code.
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+
+    Returns:
+        list: The code, with colors in the range [1, k].
+    """
+    code = [0] * n
+    value = int(value)
+    for i in range(n - 1, -1, -1):
+        value, digit = divmod(value, k)
+        code[i] = digit + 1
+    return code
+
+
+def as_sequence(code, n, k):
+    """
+    Returns a code as a list of colors, whichever representation it is given in.
+
+    Args:
+        code (list or int): A sequence of colors or a packed code.
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+
+    Returns:
+        list: The code as a list of colors.
+    """
+    if isinstance(code, (int, np.integer)):
+        return decode(code, n, k)
+    return list(code)
+
+
+def packed_dtype(n, k):
+    """
+    Returns the smallest unsigned NumPy dtype that holds every packed code.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+
+    Returns:
+        numpy.dtype: uint8, uint16, uint32 or uint64.
+
+    Raises:
+        ValueError: If packed codes do not fit into 64 bits.
+    """
+    if code_count(n, k) > 1 << 64:
+        raise ValueError(f"Codes of {k}^{n} do not fit into 64 bits")
+    return np.min_scalar_type(code_count(n, k) - 1)
+
+
+def encode_many(codes, k):
+    """
+    Packs a 2-D array of codes, one code per row.
+
+    Args:
+        codes (array-like): An (N, n) array of colors in the range [1, k].
+        k (int): Number of colors.
+
+    Returns:
+        numpy.ndarray: The N packed codes, in the smallest dtype that fits.
+    """
+    codes = np.asarray(codes)
+    n = codes.shape[1]
+    dtype = packed_dtype(n, k)
+    values = np.zeros(len(codes), dtype=dtype)
+    for i in range(n):
+        values = values * dtype.type(k) + (codes[:, i] - 1).astype(dtype)
+    return values
+
+
+def decode_many(values, n, k):
+    """
+    Unpacks an array of packed codes into a 2-D array, one code per row.
+
+    Args:
+        values (array-like): Packed codes.
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+
+    Returns:
+        numpy.ndarray: An (N, n) uint8 array of colors.
+    """
+    values = np.asarray(values, dtype=packed_dtype(n, k))
+    codes = np.empty((len(values), n), dtype=np.uint8)
+    for i in range(n - 1, -1, -1):
+        values, digits = np.divmod(values, values.dtype.type(k))
+        codes[:, i] = digits + 1
+    return codes
+
+
+class CodeArray:
+    """
+    A growable container of packed codes backed by a flat machine-integer array.
+
+    Each code takes 1 to 8 bytes depending on the size of the code space, instead
+    of a Python list of ints, and the contents can be viewed as a NumPy array
+    without copying.
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        values (array.array): The packed codes.
+    """
+
+    TYPECODES = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+    def __init__(self, n, k, codes=()):
+        """
+        Initializes the container.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            codes (iterable, optional): Codes to add, as sequences or packed integers.
+        """
+        self.n = n
+        self.k = k
+        self.values = array(self.TYPECODES[packed_dtype(n, k).itemsize])
+        for code in codes:
+            self.append(code)
+
+    @classmethod
+    def from_array(cls, codes, k):
+        """
+        Builds a container from a 2-D array of codes, one code per row.
+
+        Args:
+            codes (array-like): An (N, n) array of colors in the range [1, k].
+            k (int): Number of colors.
+
+        Returns:
+            CodeArray: The packed codes.
+        """
+        codes = np.asarray(codes)
+        result = cls(codes.shape[1], k)
+        result.values.frombytes(encode_many(codes, k).tobytes())
+        return result
+
+    def append(self, code):
+        """
+        Adds a code at the end.
+
+        Args:
+            code (list or int): A sequence of colors or a packed code.
+        """
+        self.values.append(encode(code, self.k))
+
+    def as_numpy(self):
+        """
+        Returns a NumPy view of the packed codes, sharing their memory.
+
+        Returns:
+            numpy.ndarray: The packed codes.
+        """
+        return np.frombuffer(self.values, dtype=packed_dtype(self.n, self.k))
+
+    def to_array(self):
+        """
+        Unpacks every code into a 2-D array, one code per row.
+
+        Returns:
+            numpy.ndarray: An (N, n) uint8 array of colors.
+        """
+        return decode_many(self.as_numpy(), self.n, self.k)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return decode(self.values[i], self.n, self.k)
+
+    def __iter__(self):
+        for value in self.values:
+            yield decode(value, self.n, self.k)
+
+    def __contains__(self, code):
+        return bool((self.as_numpy() == encode(code, self.k)).any())
+
+
+class QueryHistory:
+    """
+    The set of codes already queried in a game, with constant-time membership tests.
+
+    Small code spaces use a bitmap with one bit per code, larger ones a hash set of
+    packed codes. A sorted copy of the history lets `sample_unused` draw uniformly
+    from the codes not queried yet without rejection sampling.
+
+    Attributes:
+        BITMAP_LIMIT (int): Largest code space tracked with a bitmap.
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+    """
+
+    BITMAP_LIMIT = 1 << 24
+
+    def __init__(self, n, k, codes=()):
+        """
+        Initializes the history.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            codes (iterable, optional): Codes already queried, as sequences or packed integers.
+        """
+        self.n = n
+        self.k = k
+        self.order = []
+        self.sorted = []
+        if code_count(n, k) <= self.BITMAP_LIMIT:
+            self.bitmap = np.zeros((code_count(n, k) + 7) // 8, dtype=np.uint8)
+            self.seen = None
+        else:
+            self.bitmap = None
+            self.seen = set()
+        for code in codes:
+            self.add(code)
+
+    def __contains__(self, code):
+        value = encode(code, self.k)
+        if self.bitmap is not None:
+            return bool(self.bitmap[value >> 3] & (1 << (value & 7)))
+        return value in self.seen
+
+    def __len__(self):
+        return len(self.order)
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def add(self, code):
+        """
+        Records a query.
+
+        Args:
+            code (list or int): The query, as a sequence or a packed integer.
+
+        Returns:
+            bool: True if the query is new, False if it was already recorded.
+        """
+        value = encode(code, self.k)
+        if value in self:
+            return False
+
+        if self.bitmap is not None:
+            self.bitmap[value >> 3] |= 1 << (value & 7)
+        else:
+            self.seen.add(value)
+        self.order.append(value)
+        bisect.insort(self.sorted, value)
+        return True
+
+    def contains_many(self, values):
+        """
+        Tests many packed codes at once.
+
+        Args:
+            values (numpy.ndarray): Packed codes.
+
+        Returns:
+            numpy.ndarray: Boolean mask, True where the code was already queried.
+        """
+        values = np.asarray(values, dtype=np.int64)
+        if self.bitmap is not None:
+            return (self.bitmap[values >> 3] >> (values & 7) & 1).astype(bool)
+        return np.isin(values, self.order)
+
+    def sample_unused(self, rng=random):
+        """
+        Draws a packed code uniformly from the codes not queried yet.
+
+        A random rank among the unused codes is mapped to a code by skipping over the
+        sorted history, which takes time proportional to the number of queries.
+
+        Args:
+            rng (random.Random, optional): Source of randomness. Defaults to the `random` module.
+
+        Returns:
+            int: A packed code that is not in the history.
+
+        Raises:
+            RuntimeError: If every code has already been queried.
+        """
+        unused = code_count(self.n, self.k) - len(self.order)
+        if unused <= 0:
+            raise RuntimeError("Every possible query has already been used")
+
+        value = rng.randrange(unused)
+        for used in self.sorted:
+            if used > value:
+                break
+            value += 1
+        return value
@@ -0,0 +1,269 @@
+import time
+
+from candidates import propagate_domains
+
+# Node budget of the first randomized search attempt, doubled on every restart
+RESTART_NODES = 64
+
+
+class _Constraint:
+    """
+    Incremental bookkeeping for one (query, feedback) pair during the search.
+
+    Tracks the exact matches made so far, the exact matches still possible on the
+    unassigned positions and, for the unmatched positions already assigned, how many
+    times every color occurs in the code and in the query, so the color matches,
+    the sum over colors of the smaller of the two counts, are updated in constant
+    time per assignment.
+    """
+
+    def __init__(self, query, correct_position_and_color, correct_color, k, domains):
+        self.query = query
+        self.exact = correct_position_and_color
+        self.color = correct_color
+        self.matchable = [query[p] in domains[p] for p in range(len(query))]
+        self.matches = 0
+        self.exact_rest = sum(self.matchable)
+        self.code_counts = [0] * (k + 1)
+        self.query_counts = [0] * (k + 1)
+        self.shared = 0
+        self.rest_counts = [0] * (k + 1)
+        for color in query:
+            self.rest_counts[color] += 1
+        self.colors = sorted(set(query))
+
+    def assign(self, position, color):
+        wanted = self.query[position]
+        self.exact_rest -= self.matchable[position]
+        self.rest_counts[wanted] -= 1
+
+        if color == wanted:
+            self.matches += 1
+            return
+
+        if self.code_counts[color] < self.query_counts[color]:
+            self.shared += 1
+        self.code_counts[color] += 1
+
+        if self.query_counts[wanted] < self.code_counts[wanted]:
+            self.shared += 1
+        self.query_counts[wanted] += 1
+
+    def unassign(self, position, color):
+        wanted = self.query[position]
+        self.exact_rest += self.matchable[position]
+        self.rest_counts[wanted] += 1
+
+        if color == wanted:
+            self.matches -= 1
+            return
+
+        self.query_counts[wanted] -= 1
+        if self.query_counts[wanted] < self.code_counts[wanted]:
+            self.shared -= 1
+
+        self.code_counts[color] -= 1
+        if self.code_counts[color] < self.query_counts[color]:
+            self.shared -= 1
+
+    def feasible(self, unassigned, rest_code_counts):
+        """
+        Checks whether the constraint can still be met by some completion.
+
+        Args:
+            unassigned (int): Number of positions not assigned yet.
+            rest_code_counts (list): For every color, how many of those positions
+                may still take it.
+
+        Returns:
+            bool: False if the constraint is certainly violated.
+        """
+        missing = self.exact - self.matches
+        if missing < 0 or missing > self.exact_rest:
+            return False
+        # The color matches never decrease as positions are assigned
+        if self.shared > self.color:
+            return False
+        # Each unmatched position left adds at most one color on either side
+        if self.shared + 2 * (unassigned - missing) < self.color:
+            return False
+        # Every color can match at most as often as both sides can still hold it
+        reachable = 0
+        for color in self.colors:
+            reachable += min(
+                self.code_counts[color] + rest_code_counts[color],
+                self.query_counts[color] + self.rest_counts[color],
+            )
+        return reachable >= self.color
+
+
+class ConstraintSolver:
+    """
+    Backtracking search for a code consistent with a feedback history.
+
+    Every (query, feedback) pair from `Judge.check` is a constraint. The search
+    starts from the domains reduced by `candidates.propagate_domains`. At every node
+    each remaining (position, color) choice is tried against the bounds of all
+    constraints (forward checking), the position with the fewest colors left is
+    branched on next, and the branch is cut as soon as some position has none:
+
+    - the exact matches so far exceed the feedback, or cannot reach it with the
+      positions left;
+    - the color matches of the unmatched positions of code and query exceed the
+      color feedback (this count never decreases as positions are added), or cannot
+      reach it even if every color were matched as often as the counts still
+      allowed on both sides.
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        nodes (int): Number of search nodes visited by the last `solve` call.
+    """
+
+    def __init__(self, n, k, history):
+        """
+        Initializes the solver.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            history (list): (query, correct_position_and_color, correct_color) tuples.
+        """
+        self.n = n
+        self.k = k
+        self.history = [(list(q), e, c) for q, e, c in history]
+        self.domains = propagate_domains(n, k, self.history)
+        self.nodes = 0
+
+    def solve(self, rng=None, max_nodes=None, deadline=None):
+        """
+        Searches for one consistent code.
+
+        Args:
+            rng (random.Random, optional): Shuffles the color order of every position so
+                repeated calls can return different codes. Defaults to ascending order.
+            max_nodes (int, optional): Gives up after visiting this many nodes.
+            deadline (float, optional): Gives up at this `time.perf_counter()` value.
+
+        Returns:
+            list or None: A consistent code, or None if there is none (or the node
+            budget or the time ran out).
+        """
+        n = self.n
+        self.nodes = 0
+        domains = [list(domain) for domain in self.domains]
+        if rng is not None:
+            for domain in domains:
+                rng.shuffle(domain)
+
+        constraints = [
+            _Constraint(query, exact, color, self.k, self.domains)
+            for query, exact, color in self.history
+        ]
+        code = [0] * n
+        unassigned = set(range(n))
+
+        # How many unassigned positions may still take each color
+        rest_code_counts = [0] * (self.k + 1)
+        for domain in domains:
+            for color in domain:
+                rest_code_counts[color] += 1
+
+        def assign(position, color):
+            unassigned.discard(position)
+            for domain_color in domains[position]:
+                rest_code_counts[domain_color] -= 1
+            for constraint in constraints:
+                constraint.assign(position, color)
+            code[position] = color
+
+        def unassign(position, color):
+            for constraint in constraints:
+                constraint.unassign(position, color)
+            for domain_color in domains[position]:
+                rest_code_counts[domain_color] += 1
+            unassigned.add(position)
+
+        def feasible():
+            left = len(unassigned)
+            for constraint in constraints:
+                if not constraint.feasible(left, rest_code_counts):
+                    return False
+            return True
+
+        def search():
+            self.nodes += 1
+            if max_nodes is not None and self.nodes > max_nodes:
+                return None
+            if deadline is not None and time.perf_counter() > deadline:
+                return None
+            if not unassigned:
+                return all(
+                    c.matches == c.exact and c.shared == c.color for c in constraints
+                )
+
+            # Forward checking: keep the colors that leave every constraint satisfiable
+            best = None
+            for position in sorted(unassigned):
+                options = []
+                for color in domains[position]:
+                    assign(position, color)
+                    if feasible():
+                        options.append(color)
+                    unassign(position, color)
+                if not options:
+                    return False
+                if best is None or len(options) < len(best[1]):
+                    best = (position, options)
+
+            position, options = best
+            for color in options:
+                assign(position, color)
+                found = search()
+                unassign(position, color)
+                if found is None or found:
+                    return found
+            return False
+
+        if not feasible():
+            return None
+        if search():
+            return code
+        return None
+
+
+def find_consistent(n, k, history, rng=None, max_nodes=None, deadline=None):
+    """
+    Returns one code consistent with the feedback history, or None.
+
+    With a random generator the search is restarted with a new color order and a
+    doubled node budget whenever a budget runs out, which avoids getting stuck in
+    one unlucky part of the search tree.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        history (list): (query, correct_position_and_color, correct_color) tuples.
+        rng (random.Random, optional): Randomizes which consistent code is found.
+        max_nodes (int, optional): Gives up after visiting this many search nodes in total.
+        deadline (float, optional): Gives up at this `time.perf_counter()` value.
+
+    Returns:
+        list or None: A consistent code.
+    """
+    solver = ConstraintSolver(n, k, history)
+    if rng is None:
+        return solver.solve(None, max_nodes, deadline)
+
+    visited = 0
+    budget = RESTART_NODES
+    while max_nodes is None or visited < max_nodes:
+        if max_nodes is not None:
+            budget = min(budget, max_nodes - visited)
+        code = solver.solve(rng, budget, deadline)
+        visited += solver.nodes
+        if code is not None or solver.nodes <= budget:
+            # Found a code, searched the whole tree or ran out of time
+            return code
+        budget *= 2
+    return None
@@ -0,0 +1,412 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from codes import all_codes, code_count
+from judge import Judge
+
+# Bump whenever the encoding or the scoring rules change so stale files are rebuilt
+FORMAT_VERSION = 2
+
+# Side of the square (query, hidden) tiles a table is built in, small enough for the
+# temporaries of one tile to stay in cache; a band of TILE_SIZE query rows is one task
+TILE_SIZE = 256
+
+
+def outcome_count(n):
+    """
+    Returns the number of distinct encoded feedback values for sequences of length n.
+
+    Args:
+        n (int): Length of the sequence.
+
+    Returns:
+        int: The number of possible encoded feedback values.
+    """
+    return (n + 1) ** 2
+
+
+def encode_feedback(n, correct_position_and_color, correct_color):
+    """
+    Encodes a feedback pair into a single small integer.
+
+    Works on plain integers as well as on NumPy arrays returned by the batch APIs of `Judge`.
+
+    Args:
+        n (int): Length of the sequence.
+        correct_position_and_color (int or numpy.ndarray): Number of exact matches.
+        correct_color (int or numpy.ndarray): Number of color matches.
+
+    Returns:
+        int or numpy.ndarray: The encoded feedback, in the range [0, (n + 1) ** 2).
+    """
+    return correct_position_and_color * (n + 1) + correct_color
+
+
+def decode_feedback(n, value):
+    """
+    Decodes a value produced by `encode_feedback` back into a feedback pair.
+
+    Args:
+        n (int): Length of the sequence.
+        value (int): The encoded feedback.
+
+    Returns:
+        tuple: (correct_position_and_color, correct_color).
+    """
+    return divmod(int(value), n + 1)
+
+
+def default_cache_dir():
+    """
+    Returns the directory where feedback tables are stored.
+
+    The location can be overridden with the MASTERMIND_CACHE_DIR environment variable.
+
+    Returns:
+        str: Path to the cache directory.
+    """
+    return os.environ.get(
+        "MASTERMIND_CACHE_DIR",
+        os.path.join(os.path.expanduser("~"), ".cache", "mastermind"),
+    )
+
+
+class FeedbackTable:
+    """
+    Precomputed feedback for every (query, hidden) pair of codes for a fixed (n, k).
+
+    Entry [q, h] of `matrix` holds `encode_feedback` of `Judge.check(k, hidden, query)`
+    where q and h are row indices into `codes.all_codes(n, k)`. Tables loaded from
+    disk are memory-mapped read-only, so processes using the same table share one
+    copy in the page cache.
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        matrix (numpy.ndarray): A (k ** n, k ** n) uint8 array, possibly a memmap.
+        path (str or None): File the table was loaded from, None if built in memory.
+    """
+
+    def __init__(self, n, k, matrix, path=None):
+        self.n = n
+        self.k = k
+        self.matrix = matrix
+        self.path = path
+
+    @staticmethod
+    def path_for(n, k, cache_dir=None):
+        """
+        Returns the file path of the table for (n, k).
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            cache_dir (str, optional): Directory holding the tables. Defaults to `default_cache_dir()`.
+
+        Returns:
+            str: Path to the versioned table file.
+        """
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        return os.path.join(cache_dir, f"feedback-v{FORMAT_VERSION}-n{n}-k{k}.npy")
+
+    @staticmethod
+    def _fill_rows(n, k, matrix, start, stop):
+        """
+        Scores the query rows [start, stop) of `matrix`, one tile at a time.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            matrix (numpy.ndarray): Writable (k ** n, k ** n) uint8 array.
+            start (int): First query row.
+            stop (int): End of the query rows.
+        """
+        codes = all_codes(n, k)
+        queries = codes[start:stop]
+        for first in range(0, len(codes), TILE_SIZE):
+            last = min(first + TILE_SIZE, len(codes))
+            exact, color = Judge.check_all(k, codes[first:last], queries)
+            matrix[start:stop, first:last] = encode_feedback(n, exact, color).T
+
+    @classmethod
+    def _fill(cls, n, k, matrix, workers=1, progress=None, path=None, memory=None):
+        """
+        Scores every pair of codes into `matrix`, a band of query rows at a time.
+
+        With several workers the bands are filled by a process pool. Workers write
+        straight into the shared destination, either the memory-mapped file at
+        `path` or the shared memory block `memory`, and only report which band they
+        finished. Every entry is computed the same way whatever the worker count, so
+        the result is byte-for-byte identical.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            matrix (numpy.ndarray): Writable (k ** n, k ** n) uint8 array.
+            workers (int, optional): Number of worker processes. Defaults to 1.
+            progress (callable, optional): Called with (rows done, total rows) after
+                every band.
+            path (str, optional): The .npy file `matrix` is mapped from.
+            memory (str, optional): Name of the shared memory block holding `matrix`.
+
+        Raises:
+            ValueError: If several workers are requested without a shared destination.
+        """
+        size = code_count(n, k)
+        bands = [
+            (start, min(start + TILE_SIZE, size)) for start in range(0, size, TILE_SIZE)
+        ]
+        done = 0
+
+        if workers <= 1:
+            for start, stop in bands:
+                cls._fill_rows(n, k, matrix, start, stop)
+                done += stop - start
+                if progress is not None:
+                    progress(done, size)
+            return
+
+        if path is None and memory is None:
+            raise ValueError("Parallel builds need a file or shared memory to write to")
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(n, k, path, memory),
+        ) as pool:
+            futures = [
+                pool.submit(_fill_worker_rows, n, k, start, stop)
+                for start, stop in bands
+            ]
+            for future in as_completed(futures):
+                done += future.result()
+                if progress is not None:
+                    progress(done, size)
+
+    @classmethod
+    def build(cls, n, k, workers=1, progress=None):
+        """
+        Builds the table in memory without touching the disk.
+
+        With several workers the table is filled in a shared memory block and copied
+        out once complete, so the peak memory use is twice the size of the table.
+        `load_or_build` has workers fill the cache file in place instead, without a
+        copy, and suits the largest tables better.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            workers (int, optional): Number of worker processes. Defaults to 1.
+            progress (callable, optional): Called with (rows done, total rows).
+
+        Returns:
+            FeedbackTable: The freshly built table.
+
+        Raises:
+            ValueError: If the feedback does not fit into a uint8.
+        """
+        if outcome_count(n) > 256:
+            raise ValueError("Feedback tables support sequences of length up to 15")
+
+        size = code_count(n, k)
+        if workers <= 1:
+            matrix = np.empty((size, size), dtype=np.uint8)
+            cls._fill(n, k, matrix, progress=progress)
+            return cls(n, k, matrix)
+
+        memory = shared_memory.SharedMemory(create=True, size=size * size)
+        try:
+            shared = np.ndarray((size, size), dtype=np.uint8, buffer=memory.buf)
+            cls._fill(n, k, shared, workers, progress, memory=memory.name)
+            matrix = shared.copy()
+            del shared
+        finally:
+            memory.close()
+            memory.unlink()
+        return cls(n, k, matrix)
+
+    @classmethod
+    def load(cls, n, k, cache_dir=None):
+        """
+        Memory-maps a previously saved table.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            cache_dir (str, optional): Directory holding the tables.
+
+        Returns:
+            FeedbackTable or None: The table, or None if no valid file exists.
+        """
+        path = cls.path_for(n, k, cache_dir)
+        size = code_count(n, k)
+        try:
+            matrix = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        if matrix.shape != (size, size) or matrix.dtype != np.uint8:
+            return None
+        return cls(n, k, matrix, path)
+
+    @classmethod
+    def load_or_build(cls, n, k, cache_dir=None, workers=1, progress=None):
+        """
+        Memory-maps the table for (n, k), building and saving it first if needed.
+
+        The table is written straight into a temporary memory-mapped file which is
+        then atomically renamed, so concurrent processes never see a partial table.
+        Worker processes map the same file and fill it in place.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            cache_dir (str, optional): Directory holding the tables.
+            workers (int, optional): Number of worker processes. Defaults to 1.
+            progress (callable, optional): Called with (rows done, total rows).
+
+        Returns:
+            FeedbackTable: The memory-mapped table.
+
+        Raises:
+            ValueError: If the feedback does not fit into a uint8.
+        """
+        table = cls.load(n, k, cache_dir)
+        if table is not None:
+            return table
+
+        if outcome_count(n) > 256:
+            raise ValueError("Feedback tables support sequences of length up to 15")
+
+        path = cls.path_for(n, k, cache_dir)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        size = code_count(n, k)
+
+        matrix = np.lib.format.open_memmap(
+            tmp_path, mode="w+", dtype=np.uint8, shape=(size, size)
+        )
+        try:
+            try:
+                cls._fill(n, k, matrix, workers, progress, path=tmp_path)
+                matrix.flush()
+            finally:
+                # Unmap before renaming or removing the file
+                del matrix
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        return cls.load(n, k, cache_dir)
+
+    def lookup(self, queries, hidden):
+        """
+        Returns the encoded feedback of every query against every hidden code.
+
+        Args:
+            queries (array-like): Row indices of the query codes.
+            hidden (array-like): Row indices of the hidden codes.
+
+        Returns:
+            numpy.ndarray: A (len(queries), len(hidden)) uint8 array.
+        """
+        return self.matrix[np.ix_(np.asarray(queries), np.asarray(hidden))]
+
+    def check(self, query, hidden):
+        """
+        Returns the feedback for a single pair, like `Judge.check`.
+
+        Args:
+            query (int): Row index of the query code.
+            hidden (int): Row index of the hidden code.
+
+        Returns:
+            tuple: (correct_position_and_color, correct_color).
+        """
+        return decode_feedback(self.n, self.matrix[query, hidden])
+
+
+# Destination of the rows filled by a worker process, mapped once by `_init_worker`
+_worker_matrix = None
+_worker_memory = None
+
+
+def _init_worker(n, k, path, memory):
+    """
+    Maps the table being built in a worker process.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        path (str or None): The .npy file being filled, if building to disk.
+        memory (str or None): Name of the shared memory block, if building in memory.
+    """
+    global _worker_matrix, _worker_memory
+    if path is not None:
+        _worker_matrix = np.load(path, mmap_mode="r+")
+    else:
+        size = code_count(n, k)
+        _worker_memory = shared_memory.SharedMemory(name=memory)
+        _worker_matrix = np.ndarray(
+            (size, size), dtype=np.uint8, buffer=_worker_memory.buf
+        )
+
+
+def _fill_worker_rows(n, k, start, stop):
+    """
+    Fills a band of query rows of the table mapped by `_init_worker`.
+
+    Returns:
+        int: The number of rows filled.
+    """
+    FeedbackTable._fill_rows(n, k, _worker_matrix, start, stop)
+    return stop - start
+
+
+def _progress_printer(stream=sys.stderr):
+    """
+    Returns a `progress` callback printing the percentage done and the time left.
+    """
+    start = time.perf_counter()
+
+    def report(done, total):
+        elapsed = time.perf_counter() - start
+        left = elapsed * (total - done) / done
+        stream.write(f"\rFeedback table: {done / total:6.1%}, {left:.0f} s left")
+        if done == total:
+            stream.write("\n")
+        stream.flush()
+
+    return report
+
+
+def main():
+    """
+    Command-line entry point building a cached feedback table.
+    """
+    parser = argparse.ArgumentParser(description="Build a cached feedback table.")
+    parser.add_argument("-n", type=int, default=4, help="sequence length")
+    parser.add_argument("-k", type=int, default=6, help="number of colors")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="number of worker processes"
+    )
+    parser.add_argument("--cache-dir", help="directory holding the tables")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = FeedbackTable.load_or_build(
+        args.n, args.k, args.cache_dir, args.workers, _progress_printer()
+    )
+    print(f"{table.path} ({time.perf_counter() - start:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
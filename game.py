@@ -1,91 +1,381 @@
+import argparse
+import asyncio
+import time
+from collections import namedtuple
+
+import instrumentation
+from codes import as_sequence, encode
 from judge import Judge
-from player import AutoPlayer, ManualPlayer
+from player import ManualPlayer, make_auto_player
 from simple_interface import Interface
 
+# Outcome of one turn; status is "playing", "won" or "lost", and seconds is the time
+# spent choosing and judging the query
+TurnResult = namedtuple(
+    "TurnResult",
+    [
+        "turn",
+        "query",
+        "correct_position_and_color",
+        "correct_color",
+        "status",
+        "seconds",
+    ],
+)
+
 
 class Game:
     """
     Represents the main game logic, managing turns, player interactions, and game status.
+
+    The game does no console I/O: every turn is returned as a `TurnResult`, so many
+    games can be driven from one process. Queries come from the player, or are passed
+    to `play_turn` / `step` for players driven from outside (e.g. a network client).
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        hidden_seq (list): The hidden sequence.
+        player: Object with `get_query(n, k)` and `receive_feedback(...)`, or None.
+        max_turns (int): Maximum number of turns.
+        turns (int): Number of turns played.
+        status (str): "playing", "won" or "lost".
+        history (list): The `TurnResult` of every turn played.
+        used_queries (set): Packed codes of the queries played.
+        started (float): Creation time of the game, in Unix seconds.
+        log (ReplayWriter or None): Log the game is appended to once it ends.
     """
 
-    def __init__(self):
-        self.player = None
-        self.judge = Judge()
-        self.interface = Interface()
-        self.n, self.k, self.game_mode, self.hidden_seq = (
-            self.interface.get_game_config()
-        )
-        self.max_turns = 10  # Adjust maximum turns based on sequence length
-        self.turns = 0  # Initialize turn counter
-        self.choose_player()
+    def __init__(
+        self,
+        n,
+        k,
+        hidden_seq,
+        player=None,
+        max_turns=10,
+        judge=Judge,
+        executor=None,
+        log=None,
+    ):
+        """
+        Initializes a game.
 
-    def choose_player(self):
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            hidden_seq (list): The hidden sequence.
+            player (optional): Object with `get_query(n, k)` and `receive_feedback`
+                methods. Without one, every query must be passed to `play_turn` or
+                `step`.
+            max_turns (int, optional): Maximum number of turns. Defaults to 10.
+            judge (optional): Object with a `check(k, hidden, query, n)` method, such
+                as a shared `CachedJudge`. Defaults to `Judge`.
+            executor (concurrent.futures.Executor, optional): Where `step` runs the
+                player's `get_query`, so slow solvers do not block the event loop.
+                Defaults to running it inline.
+            log (ReplayWriter, optional): Log the game is appended to once it ends.
         """
-        Chooses the type of player based on the game mode.
+        self.n = n
+        self.k = k
+        self.hidden_seq = hidden_seq
+        self.player = player
+        self.max_turns = max_turns
+        self.judge = judge
+        self.executor = executor
+        self.turns = 0
+        self.status = "playing"
+        self.history = []
+        # A game makes few queries: a set of them is far smaller than a bitmap over
+        # the code space, which matters with thousands of games in one server
+        self.used_queries = set()
+        self.started = time.time()
+        self.log = log
+        self.logged = False
+
+    @property
+    def over(self):
+        """bool: Whether the game is won or lost."""
+        return self.status != "playing"
+
+    def _next_query(self):
         """
-        if self.game_mode == "auto":
-            self.player = AutoPlayer()
-        else:
-            self.player = ManualPlayer()
+        Asks the player for its next query.
 
-    def check_game_status(self, correct_position_and_color, correct_color):
+        Raises:
+            ValueError: If the game has no player.
         """
-        Checks the current game status to determine if the game should continue.
+        if self.player is None:
+            raise ValueError("A query is required for a game without a player")
+        with instrumentation.span("player.get_query"):
+            return self.player.get_query(self.n, self.k)
+
+    def write_log(self):
+        """
+        Appends the game to its log, once; called when the game ends and by callers
+        that abandon a game early.
+        """
+        if self.log is not None and not self.logged:
+            self.log.write_game(self)
+            self.logged = True
+
+    def _apply(self, query, start):
+        """
+        Judges a query, informs the player and advances the game.
 
         Args:
+            query (list or int): The query, as a sequence or a packed code.
+            start (float): `time.perf_counter()` when the turn started.
+
+        Returns:
+            TurnResult: The outcome of the turn.
+
+        Raises:
+            RuntimeError: If the game is already over.
+            ValueError: If the query is invalid or has already been used.
+        """
+        with instrumentation.span("judge.check"):
+            correct_position_and_color, correct_color = self.judge.check(
+                self.k, self.hidden_seq, query, self.n
+            )
+        return self.record(
+            query,
+            correct_position_and_color,
+            correct_color,
+            time.perf_counter() - start,
+        )
+
+    def record(self, query, correct_position_and_color, correct_color, seconds=0.0):
+        """
+        Advances the game with the feedback of a query judged elsewhere, e.g. by a
+        server scoring the guesses of many games in one batch.
+
+        Args:
+            query (list or int): The query, as a sequence or a packed code.
             correct_position_and_color (int): Number of exact matches.
             correct_color (int): Number of color matches (excluding position).
+            seconds (float, optional): Time spent on the turn.
 
         Returns:
-            bool: False if the game is won or lost, True otherwise.
+            TurnResult: The outcome of the turn.
+
+        Raises:
+            RuntimeError: If the game is already over.
+            ValueError: If the query has already been used.
         """
-        if correct_position_and_color == len(self.hidden_seq):
-            print(f"\nYou win!!! Found the sequence in {self.turns} turns.")
-            return False
+        if self.over:
+            raise RuntimeError("The game is over")
+        value = encode(query, self.k)
+        if value in self.used_queries:
+            raise ValueError("This query has already been used")
+        self.used_queries.add(value)
+
+        self.turns += 1
+        if self.player is not None:
+            with instrumentation.span("player.receive_feedback"):
+                self.player.receive_feedback(
+                    query, correct_position_and_color, correct_color
+                )
+
+        if correct_position_and_color == self.n:
+            self.status = "won"
         elif self.turns >= self.max_turns:
-            print(f"\nGame Over! Maximum turns ({self.max_turns}) reached.")
-            print(f"The hidden sequence was: {self.hidden_seq}")
-            return False
+            self.status = "lost"
+
+        result = TurnResult(
+            self.turns,
+            query,
+            correct_position_and_color,
+            correct_color,
+            self.status,
+            seconds,
+        )
+        self.history.append(result)
+        if self.over:
+            self.write_log()
+        return result
+
+    def play_turn(self, query=None):
+        """
+        Plays one turn.
+
+        Args:
+            query (list or int, optional): The query to play. Defaults to asking the
+                player.
+
+        Returns:
+            TurnResult: The outcome of the turn.
+        """
+        start = time.perf_counter()
+        if query is None:
+            query = self._next_query()
+        return self._apply(query, start)
+
+    async def step(self, query=None):
+        """
+        Plays one turn from a coroutine.
+
+        The player's decision runs in `executor` if one was given; otherwise it runs
+        inline and the coroutine yields to the event loop once the turn is judged.
+
+        Args:
+            query (list or int, optional): The query to play. Defaults to asking the
+                player.
+
+        Returns:
+            TurnResult: The outcome of the turn.
+        """
+        start = time.perf_counter()
+        if query is None:
+            if self.executor is None:
+                query = self._next_query()
+            else:
+                loop = asyncio.get_running_loop()
+                query = await loop.run_in_executor(self.executor, self._next_query)
+        result = self._apply(query, start)
+        await asyncio.sleep(0)
+        return result
+
+    async def run(self):
+        """
+        Plays turns with the player until the game is over.
+
+        Returns:
+            list: The `TurnResult` of every turn.
+        """
+        while not self.over:
+            await self.step()
+        return self.history
+
+
+class ConsoleGame:
+    """
+    Plays a `Game` in the console, printing every turn.
+    """
+
+    def __init__(self, game, instrumentation=None):
+        """
+        Initializes the console game.
+
+        Args:
+            game (Game): The game to play.
+            instrumentation (Instrumentation, optional): Receives the timing spans and
+                counters of the game. Defaults to no instrumentation.
+        """
+        self.game = game
+        self.instrumentation = instrumentation
+
+    @classmethod
+    def from_user(cls, instrumentation=None, log=None):
+        """
+        Asks the user for the game configuration and creates the matching game.
+
+        Args:
+            instrumentation (Instrumentation, optional): Passed to the console game.
+            log (ReplayWriter, optional): Log the game is appended to.
+
+        Returns:
+            ConsoleGame: The configured game.
+        """
+        n, k, game_mode, hidden_seq = Interface().get_game_config()
+        if game_mode == "auto":
+            player = make_auto_player(n, k)
+        else:
+            player = ManualPlayer()
+        return cls(Game(n, k, hidden_seq, player, log=log), instrumentation)
+
+    def render(self, result):
+        """
+        Prints the outcome of one turn.
+
+        Args:
+            result (TurnResult): The turn to print.
+        """
+        game = self.game
+        if result.status == "won":
+            print(f"\nYou win!!! Found the sequence in {result.turn} turns.")
+        elif result.status == "lost":
+            print(f"\nGame Over! Maximum turns ({game.max_turns}) reached.")
+            print(
+                f"The hidden sequence was: {as_sequence(game.hidden_seq, game.n, game.k)}"
+            )
         else:
-            print(f"Turn {self.turns}/{self.max_turns}")
-            print(f"Correct position and color: {correct_position_and_color}")
-            print(f"Correct color but wrong position: {correct_color}\n")
-            return True
+            print(f"Turn {result.turn}/{game.max_turns}")
+            print(f"Correct position and color: {result.correct_position_and_color}")
+            print(f"Correct color but wrong position: {result.correct_color}\n")
 
     def play(self):
         """
         Runs the main game loop.
         """
+        game = self.game
         print(
-            f"\nGame started! Try to guess a sequence of length {self.n} using numbers 1 to {self.k}"
+            f"\nGame started! Try to guess a sequence of length {game.n} using numbers 1 to {game.k}"
         )
-        print(f"You have {self.max_turns} turns to guess correctly.\n")
+        print(f"You have {game.max_turns} turns to guess correctly.\n")
         print("Press Ctrl+D at any time to end the game early.\n")
 
-        while True:
-            try:
-                # Get query from the player
-                query = self.player.get_query(self.n, self.k)
-                print(f"Your guess: {query}")
+        with instrumentation.recording(self.instrumentation):
+            self._play_turns()
 
-                self.turns += 1
-
-                # Check the query against the hidden sequence
-                correct_position_and_color, correct_color = self.judge.check(
-                    self.k, self.hidden_seq, query
-                )
-
-                # Check game status and break the loop if the game is over
-                if not self.check_game_status(
-                    correct_position_and_color, correct_color
-                ):
-                    break
+        if self.instrumentation is not None:
+            print(f"\n{self.instrumentation}")
 
+    def _play_turns(self):
+        """
+        Plays turns until the game is won, lost or ended by the user.
+        """
+        game = self.game
+        while not game.over:
+            try:
+                query = game._next_query()
+                print(f"Your guess: {as_sequence(query, game.n, game.k)}")
+                result = game.play_turn(query)
+                with instrumentation.span("feedback.render"):
+                    self.render(result)
             except EOFError:
                 print("\nGame terminated. Goodbye!")
-                print(f"The hidden sequence was: {self.hidden_seq}")
+                print(
+                    f"The hidden sequence was: {as_sequence(game.hidden_seq, game.n, game.k)}"
+                )
+                game.write_log()
                 break
 
 
-g = Game()
-g.play()
+def main():
+    """
+    Command-line entry point for console games.
+    """
+    parser = argparse.ArgumentParser(description="Play Mastermind in the console.")
+    parser.add_argument(
+        "--stats", action="store_true", help="print where the time of each turn went"
+    )
+    parser.add_argument("--profile", help="write cProfile statistics to this file")
+    parser.add_argument(
+        "--trace", help="write a Chrome trace of the turns to this file"
+    )
+    parser.add_argument("--log", help="append the game to this replay log")
+    args = parser.parse_args()
+
+    recorder = None
+    if args.stats or args.profile or args.trace:
+        recorder = instrumentation.Instrumentation(profile=args.profile is not None)
+
+    log = None
+    if args.log:
+        # Imported here: replay depends on this module
+        from replay import ReplayWriter
+
+        log = ReplayWriter(args.log)
+
+    ConsoleGame.from_user(recorder, log).play()
+    if log is not None:
+        log.close()
+
+    if args.profile:
+        recorder.dump_profile(args.profile)
+    if args.trace:
+        recorder.dump_trace(args.trace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import contextlib
+import cProfile
+import json
+import threading
+import time
+from collections import Counter, defaultdict
+
+# Returned by `span` while nothing is recording; reusable and reentrant
+_NULL_SPAN = contextlib.nullcontext()
+
+# Instrumentation receiving the module-level `span` and `count` calls, if any
+_active = None
+
+
+class Instrumentation:
+    """
+    Collects timing spans and counters for one game.
+
+    Spans time the steps of a turn (player decision, judging, feedback rendering)
+    and counters accumulate work done inside them, such as candidates scored or
+    pruned. Optionally the game is also run under cProfile.
+
+    Attributes:
+        spans (defaultdict): Durations in seconds recorded for every span name.
+        counters (Counter): Accumulated value of every counter.
+        events (list): (name, thread id, start, duration) of every span, for traces.
+        profiler (cProfile.Profile or None): Profiler enabled by `recording`.
+    """
+
+    def __init__(self, profile=False):
+        """
+        Initializes an empty report.
+
+        Args:
+            profile (bool, optional): Run cProfile while recording. Defaults to False.
+        """
+        self.spans = defaultdict(list)
+        self.counters = Counter()
+        self.events = []
+        self.profiler = cProfile.Profile() if profile else None
+        self.origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, name):
+        """
+        Times the enclosed block.
+
+        Args:
+            name (str): Name the duration is recorded under.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.spans[name].append(duration)
+            self.events.append((name, threading.get_ident(), start, duration))
+
+    def count(self, name, value=1):
+        """
+        Adds to a counter.
+
+        Args:
+            name (str): Name of the counter.
+            value (int, optional): Amount to add. Defaults to 1.
+        """
+        self.counters[name] += value
+
+    def report(self):
+        """
+        Summarizes the spans and counters.
+
+        Returns:
+            dict: "spans" maps every span name to its call count, total and mean
+                duration in seconds; "counters" maps counter names to their values.
+        """
+        return {
+            "spans": {
+                name: {
+                    "calls": len(durations),
+                    "total": sum(durations),
+                    "mean": sum(durations) / len(durations),
+                }
+                for name, durations in self.spans.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def __str__(self):
+        lines = ["Time per step:"]
+        for name, durations in sorted(self.spans.items()):
+            total = sum(durations)
+            lines.append(
+                f"  {name:<24} {len(durations):5d} calls {total * 1000:10.2f} ms"
+                f" ({total / len(durations) * 1000:.3f} ms each)"
+            )
+        if self.counters:
+            lines.append("Counters:")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"  {name:<24} {value}")
+        return "\n".join(lines)
+
+    def dump_profile(self, path):
+        """
+        Writes the cProfile statistics, readable with `pstats` or snakeviz.
+
+        Args:
+            path (str): Destination file.
+
+        Raises:
+            RuntimeError: If the instrumentation was created without profiling.
+        """
+        if self.profiler is None:
+            raise RuntimeError("Profiling was not enabled for this game")
+        self.profiler.dump_stats(path)
+
+    def dump_trace(self, path):
+        """
+        Writes the spans in the Chrome trace event format (chrome://tracing, Perfetto).
+
+        Args:
+            path (str): Destination file.
+        """
+        events = [
+            {
+                "name": name,
+                "ph": "X",
+                "pid": 0,
+                "tid": thread,
+                "ts": (start - self.origin) * 1e6,
+                "dur": duration * 1e6,
+            }
+            for name, thread, start, duration in self.events
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events}, f)
+
+
+def activate(instrumentation):
+    """
+    Routes the module-level `span` and `count` calls to an instrumentation.
+
+    Used by event-driven callers that cannot wrap a game in `recording`; the
+    profiler is not started.
+
+    Args:
+        instrumentation (Instrumentation or None): The receiver; None records nothing.
+
+    Returns:
+        Instrumentation or None: The receiver that was active before.
+    """
+    global _active
+    previous = _active
+    _active = instrumentation
+    return previous
+
+
+@contextlib.contextmanager
+def recording(instrumentation):
+    """
+    Routes the module-level `span` and `count` calls to an instrumentation.
+
+    The profiler, if any, only sees the thread that entered this block.
+
+    Args:
+        instrumentation (Instrumentation or None): The receiver; None records nothing.
+    """
+    previous = activate(instrumentation)
+    profiler = instrumentation.profiler if instrumentation is not None else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield instrumentation
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        activate(previous)
+
+
+def span(name):
+    """
+    Times the enclosed block if an instrumentation is recording.
+
+    Args:
+        name (str): Name the duration is recorded under.
+
+    Returns:
+        context manager: The span, or a shared no-op context when disabled.
+    """
+    if _active is None:
+        return _NULL_SPAN
+    return _active.span(name)
+
+
+def count(name, value=1):
+    """
+    Adds to a counter if an instrumentation is recording.
+
+    Args:
+        name (str): Name of the counter.
+        value (int, optional): Amount to add. Defaults to 1.
+    """
+    if _active is not None:
+        _active.count(name, value)
@@ -1,10 +1,41 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from codes import code_count, decode, decode_many
+
+
 class Judge:
     """
     The Judge class provides a mechanism to compare a hidden sequence with a query sequence
     and evaluate how many elements match in position and color, and how many match in color only.
     """
     @staticmethod
-    def check(k, hidden, query):
+    def _unpack(k, code, n):
+        """
+        Turns a packed code (see `codes.encode`) into a list of colors.
+
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            code (list or int): A sequence of colors or a packed code.
+            n (int or None): Length of the sequence, required for packed codes.
+
+        Returns:
+            list: The code as a list of colors.
+
+        Raises:
+            ValueError: If a packed code is given without n or is out of range.
+        """
+        if not isinstance(code, (int, np.integer)):
+            return code
+        if n is None:
+            raise ValueError("The sequence length n is required for packed codes")
+        if not 0 <= code < code_count(n, k):
+            raise ValueError(f"Packed code must be between 0 and {k}^{n} - 1")
+        return decode(code, n, k)
+
+    @staticmethod
+    def check(k, hidden, query, n=None):
         """
         Compares a hidden sequence with a query sequence to determine:
         1. The number of exact matches (correct position and color).
@@ -12,8 +43,9 @@ class Judge:
 
         Args:
             k (int): The number of colors allowed in the sequences.
-            hidden (list): The hidden sequence to be guessed.
-            query (list): The query sequence provided by the player.
+            hidden (list or int): The hidden sequence to be guessed, or its packed code.
+            query (list or int): The query sequence provided by the player, or its packed code.
+            n (int, optional): Length of the sequences, required for packed codes.
 
         Returns:
             tuple containing:
@@ -24,31 +56,351 @@ class Judge:
             ValueError: If the sequences have different lengths or contain invalid colors.
         """
 
-        # Basic validation
+        hidden = Judge._unpack(k, hidden, n)
+        query = Judge._unpack(k, query, n)
+
         if len(hidden) != len(query):
             raise ValueError("Sequences must be the same length")
 
-        if any(x < 1 or x > k for x in hidden + query):
-            raise ValueError(f"All numbers must be between 1 and {k}")
+        return Judge.score(k, hidden, query, [0] * (k + 1))
+
+    @staticmethod
+    def score(k, hidden, query, counts):
+        """
+        Scores two sequences of equal length in a single pass.
 
-        # Count exact matches (right color, right position)
-        correct_position_and_color = sum(h == q for h, q in zip(hidden, query))
+        counts[c] tracks the unmatched occurrences of color c in the hidden sequence
+        minus those in the query, so a color is matched as soon as it turns up on the
+        side that was short of it. This gives the standard rule: every color scores
+        min(occurrences in hidden, occurrences in query), minus its exact matches.
+        The array is restored to zeros before returning, so callers scoring many
+        pairs can pass the same one every time and the loop allocates nothing.
 
-        # Get unmatched elements
-        hidden_remaining = [h for h, q in zip(hidden, query) if h != q]
-        query_remaining = [q for h, q in zip(hidden, query) if h != q]
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            hidden (sequence): The hidden sequence.
+            query (sequence): The query sequence, of the same length.
+            counts (list): k + 1 zeros, used as scratch space.
 
-        hidden_remaining = set(hidden_remaining)
-        query_remaining = set(query_remaining)
+        Returns:
+            tuple: (correct_position_and_color, correct_color).
 
-        # Count partial matches (right color, wrong position)
+        Raises:
+            ValueError: If the sequences contain invalid colors.
+        """
+        correct_position_and_color = 0
         correct_color = 0
-        for color in query_remaining:
-            if color in hidden_remaining:
+        for h, q in zip(hidden, query):
+            if not (0 < h <= k and 0 < q <= k):
+                counts[:] = [0] * len(counts)
+                raise ValueError(f"All numbers must be between 1 and {k}")
+            if h == q:
+                correct_position_and_color += 1
+                continue
+            if counts[h] < 0:
+                correct_color += 1
+            counts[h] += 1
+            if counts[q] > 0:
                 correct_color += 1
+            counts[q] -= 1
+
+        for h, q in zip(hidden, query):
+            counts[h] = counts[q] = 0
 
         return correct_position_and_color, correct_color
 
+    @staticmethod
+    def _validate_batch(k, codes, name, n=None):
+        """
+        Validates a batch of codes given as a 2-D integer array or as packed codes.
+
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            codes (array-like): Codes to validate, one code per row, or a 1-D array of packed codes.
+            name (str): Name of the argument, used in error messages.
+            n (int, optional): Length of the sequences, required for packed codes.
+
+        Returns:
+            numpy.ndarray: The codes as a 2-D integer array.
+
+        Raises:
+            ValueError: If the array is not 2-D, not integer or contains invalid colors.
+        """
+        codes = np.asarray(codes)
+        if codes.ndim == 1 and n is not None:
+            if codes.size and (codes.min() < 0 or codes.max() >= code_count(n, k)):
+                raise ValueError(f"Packed codes must be between 0 and {k}^{n} - 1")
+            codes = decode_many(codes, n, k)
+        if codes.ndim != 2:
+            raise ValueError(f"{name} must be a 2-D array with one code per row")
+        if codes.size and not np.issubdtype(codes.dtype, np.integer):
+            raise ValueError(f"{name} must contain integers")
+        if codes.size and (codes.min() < 1 or codes.max() > k):
+            raise ValueError(f"All numbers must be between 1 and {k}")
+        return codes
+
+    @staticmethod
+    def _score(k, hidden, query):
+        """
+        Scores broadcastable arrays of hidden and query codes along the last axis.
+
+        Like `score`, every color contributes the smaller of its counts in the two
+        codes. The counts are taken per code before broadcasting, so for all-pairs
+        scoring the loop over the k colors only builds (H, 1) and (1, Q) histograms,
+        and the total matches minus the exact matches gives the color matches.
+
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            hidden (numpy.ndarray): Hidden codes, already validated.
+            query (numpy.ndarray): Query codes, already validated.
+
+        Returns:
+            tuple containing:
+                - correct_position_and_color (numpy.ndarray): Exact matches per pair.
+                - correct_color (numpy.ndarray): Color matches per pair.
+        """
+        correct_position_and_color = (hidden == query).sum(axis=-1)
+
+        matches = np.zeros_like(correct_position_and_color)
+        for color in range(1, k + 1):
+            matches += np.minimum(
+                (hidden == color).sum(axis=-1), (query == color).sum(axis=-1)
+            )
+
+        return correct_position_and_color, matches - correct_position_and_color
+
+    @staticmethod
+    def check_many(k, candidates, query, n=None):
+        """
+        Compares one query sequence with every candidate hidden sequence in a batch.
+
+        Gives the same results as calling `check` for every row of `candidates`,
+        but validates the inputs only once and scores the whole batch with NumPy.
+
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            candidates (array-like): Hidden sequences as an (N, n) integer array,
+                or as a 1-D array of N packed codes when n is given.
+            query (list or int): The query sequence provided by the player, or its packed code.
+            n (int, optional): Length of the sequences, required for packed codes.
+
+        Returns:
+            tuple containing:
+                - correct_position_and_color (numpy.ndarray): Exact matches, shape (N,).
+                - correct_color (numpy.ndarray): Color matches, shape (N,).
+
+        Raises:
+            ValueError: If the sequences have different lengths or contain invalid colors.
+        """
+        candidates = Judge._validate_batch(k, candidates, "candidates", n)
+        query = Judge._unpack(k, query, n)
+        query = Judge._validate_batch(k, np.asarray(query).reshape(1, -1), "query")
+
+        if candidates.shape[1] != query.shape[1]:
+            raise ValueError("Sequences must be the same length")
+
+        return Judge._score(k, candidates, query)
+
+    @staticmethod
+    def check_all(k, hidden, queries, n=None):
+        """
+        Compares every hidden sequence with every query sequence.
+
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            hidden (array-like): Hidden sequences as an (H, n) integer array,
+                or as a 1-D array of packed codes when n is given.
+            queries (array-like): Query sequences as a (Q, n) integer array,
+                or as a 1-D array of packed codes when n is given.
+            n (int, optional): Length of the sequences, required for packed codes.
+
+        Returns:
+            tuple containing:
+                - correct_position_and_color (numpy.ndarray): Exact matches, shape (H, Q).
+                - correct_color (numpy.ndarray): Color matches, shape (H, Q).
+
+        Raises:
+            ValueError: If the sequences have different lengths or contain invalid colors.
+        """
+        hidden = Judge._validate_batch(k, hidden, "hidden", n)
+        queries = Judge._validate_batch(k, queries, "queries", n)
+
+        if hidden.shape[1] != queries.shape[1]:
+            raise ValueError("Sequences must be the same length")
+
+        return Judge._score(k, hidden[:, np.newaxis, :], queries[np.newaxis, :, :])
+
+    @staticmethod
+    def check_pairs(k, hidden, queries, n=None):
+        """
+        Compares every hidden sequence with the query sequence in the same row.
+
+        Gives the same results as calling `check` for every (hidden, query) pair, for
+        example to score the guesses of many independent games in one call.
+
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            hidden (array-like): Hidden sequences as an (N, n) integer array,
+                or as a 1-D array of packed codes when n is given.
+            queries (array-like): Query sequences as an (N, n) integer array,
+                or as a 1-D array of packed codes when n is given.
+            n (int, optional): Length of the sequences, required for packed codes.
+
+        Returns:
+            tuple containing:
+                - correct_position_and_color (numpy.ndarray): Exact matches, shape (N,).
+                - correct_color (numpy.ndarray): Color matches, shape (N,).
+
+        Raises:
+            ValueError: If the batches have different shapes or contain invalid colors.
+        """
+        hidden = Judge._validate_batch(k, hidden, "hidden", n)
+        queries = Judge._validate_batch(k, queries, "queries", n)
+
+        if hidden.shape != queries.shape:
+            raise ValueError("hidden and queries must have the same shape")
+
+        return Judge._score(k, hidden, queries)
+
+
+class CachedJudge(Judge):
+    """
+    A Judge that remembers the feedback of recent (hidden, query) pairs.
+
+    Both codes are packed (see `codes.encode`) into a single integer, keyed together
+    with (n, k) so one cache can serve several code spaces. The cache holds at most
+    `capacity` pairs; when full it evicts the least recently used pair ("lru") or the
+    oldest inserted one ("fifo"). Batch methods are inherited unchanged.
+
+    Attributes:
+        capacity (int): Maximum number of cached pairs.
+        eviction (str): Eviction policy, "lru" or "fifo".
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that had to be computed.
+        evictions (int): Number of pairs dropped to make room.
+    """
+
+    EVICTION_POLICIES = ("lru", "fifo")
+
+    def __init__(self, capacity=1 << 16, eviction="lru"):
+        """
+        Initializes an empty cache.
+
+        Args:
+            capacity (int, optional): Maximum number of cached pairs. Defaults to 65536.
+            eviction (str, optional): "lru" or "fifo". Defaults to "lru".
+
+        Raises:
+            ValueError: If the capacity is not positive or the policy is unknown.
+        """
+        if capacity < 1:
+            raise ValueError("The cache capacity must be positive")
+        if eviction not in self.EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction}")
+        self.capacity = capacity
+        self.eviction = eviction
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _pack(k, code, n):
+        """
+        Packs a code for the cache key, validating it like `Judge.check` would.
+
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            code (list or int): A sequence of colors or a packed code.
+            n (int): Length of the sequence.
+
+        Returns:
+            int: The packed code.
+
+        Raises:
+            ValueError: If the code has the wrong length or contains invalid colors.
+        """
+        if isinstance(code, (int, np.integer)):
+            Judge._unpack(k, code, n)
+            return int(code)
+        if len(code) != n:
+            raise ValueError("Sequences must be the same length")
+
+        value = 0
+        for color in code:
+            if color < 1 or color > k:
+                raise ValueError(f"All numbers must be between 1 and {k}")
+            value = value * k + int(color) - 1
+        return value
+
+    def check(self, k, hidden, query, n=None):
+        """
+        Returns the feedback of `Judge.check`, from the cache when possible.
+
+        Args:
+            k (int): The number of colors allowed in the sequences.
+            hidden (list or int): The hidden sequence, or its packed code.
+            query (list or int): The query sequence, or its packed code.
+            n (int, optional): Length of the sequences, required for packed codes.
+
+        Returns:
+            tuple: (correct_position_and_color, correct_color).
+
+        Raises:
+            ValueError: If the sequences have different lengths or contain invalid colors.
+        """
+        if n is None:
+            if isinstance(hidden, (int, np.integer)):
+                raise ValueError("The sequence length n is required for packed codes")
+            n = len(hidden)
+
+        packed = self._pack(k, hidden, n) * code_count(n, k) + self._pack(k, query, n)
+        key = (n, k, packed)
+
+        feedback = self.cache.get(key)
+        if feedback is not None:
+            self.hits += 1
+            if self.eviction == "lru":
+                self.cache.move_to_end(key)
+            return feedback
+
+        self.misses += 1
+        feedback = Judge.check(k, hidden, query, n)
+        self.cache[key] = feedback
+        if len(self.cache) > self.capacity:
+            self.cache.popitem(last=False)
+            self.evictions += 1
+        return feedback
+
+    @property
+    def hit_rate(self):
+        """float: Fraction of lookups answered from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def cache_info(self):
+        """
+        Returns the cache statistics.
+
+        Returns:
+            dict: hits, misses, evictions, size and capacity.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self.cache),
+            "capacity": self.capacity,
+        }
+
+    def clear(self):
+        """
+        Drops every cached pair and resets the statistics.
+        """
+        self.cache.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
 # Example usage
 # hidden = [2,3,1,2]
 # query = [2,3,1,1]
@@ -0,0 +1,223 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+
+from player import make_player
+from server import DEFAULT_HOST, DEFAULT_PORT, GameServer
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of a list of values.
+
+    Args:
+        values (list): The values, in any order.
+        fraction (float): The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        float: The percentile, or NaN for an empty list.
+    """
+    if not values:
+        return math.nan
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class LoadReport:
+    """
+    Results of a load test.
+
+    Attributes:
+        sessions (int): Number of sessions played to the end.
+        errors (int): Number of error responses.
+        latencies (list): Round-trip time of every guess, in seconds.
+        seconds (float): Wall-clock duration of the test.
+    """
+
+    def __init__(self):
+        self.sessions = 0
+        self.errors = 0
+        self.latencies = []
+        self.seconds = 0.0
+
+    def as_dict(self):
+        """
+        Returns the report as plain data, suitable for JSON.
+
+        Returns:
+            dict: The report fields and statistics.
+        """
+        return {
+            "sessions": self.sessions,
+            "errors": self.errors,
+            "guesses": len(self.latencies),
+            "seconds": self.seconds,
+            "sessions_per_second": self.sessions / self.seconds if self.seconds else 0,
+            "latency_ms": {
+                name: percentile(self.latencies, fraction) * 1000
+                for name, fraction in [("p50", 0.5), ("p95", 0.95), ("p99", 0.99)]
+            },
+        }
+
+    def __str__(self):
+        data = self.as_dict()
+        latency = data["latency_ms"]
+        return "\n".join(
+            [
+                f"Sessions: {self.sessions} ({data['sessions_per_second']:.1f}/s),"
+                f" errors: {self.errors}",
+                f"Guesses: {data['guesses']} in {self.seconds:.2f} s",
+                f"Guess latency: p50 {latency['p50']:.2f} ms,"
+                f" p95 {latency['p95']:.2f} ms, p99 {latency['p99']:.2f} ms",
+            ]
+        )
+
+
+async def _request(reader, writer, request):
+    writer.write(json.dumps(request).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def _client(host, port, n, k, player, sessions, report):
+    """
+    Plays sessions one after another over a single connection.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(sessions):
+            response = await _request(reader, writer, {"op": "new", "n": n, "k": k})
+            if "error" in response:
+                report.errors += 1
+                continue
+            session = response["session"]
+            agent = make_player(player)
+
+            while True:
+                query = agent.get_query(n, k)
+                start = time.perf_counter()
+                response = await _request(
+                    reader,
+                    writer,
+                    {"op": "guess", "session": session, "query": list(map(int, query))},
+                )
+                report.latencies.append(time.perf_counter() - start)
+                if "error" in response:
+                    report.errors += 1
+                    # The session may still be open: free it for the others
+                    await _request(reader, writer, {"op": "close", "session": session})
+                    break
+                if response["status"] != "playing":
+                    report.sessions += 1
+                    break
+                agent.receive_feedback(
+                    query,
+                    response["correct_position_and_color"],
+                    response["correct_color"],
+                )
+    finally:
+        writer.close()
+
+
+async def run_load(
+    host=DEFAULT_HOST,
+    port=DEFAULT_PORT,
+    n=4,
+    k=6,
+    player="random",
+    clients=100,
+    sessions=10,
+    seed=None,
+):
+    """
+    Plays sessions against a server from many concurrent connections.
+
+    Args:
+        host (str, optional): Server address. Defaults to localhost.
+        port (int, optional): Server port.
+        n (int, optional): Length of the sequences. Defaults to 4.
+        k (int, optional): Number of colors. Defaults to 6.
+        player (str, optional): Name accepted by `player.make_player`. Defaults to
+            "random".
+        clients (int, optional): Number of concurrent connections. Defaults to 100.
+        sessions (int, optional): Sessions played by every connection. Defaults to 10.
+        seed (int, optional): Seed for the players.
+
+    Returns:
+        LoadReport: The measurements.
+    """
+    if seed is not None:
+        random.seed(seed)
+    report = LoadReport()
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _client(host, port, n, k, player, sessions, report)
+            for _ in range(clients)
+        )
+    )
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+async def _main(args):
+    host, port = args.host, args.port
+    listener = None
+    if args.local:
+        listener = await GameServer(seed=args.seed).serve(host, 0)
+        port = listener.sockets[0].getsockname()[1]
+
+    try:
+        return await run_load(
+            host,
+            port,
+            args.n,
+            args.k,
+            args.player,
+            args.clients,
+            args.sessions,
+            args.seed,
+        )
+    finally:
+        if listener is not None:
+            listener.close()
+            await listener.wait_closed()
+
+
+def main():
+    """
+    Command-line entry point for the load generator.
+    """
+    parser = argparse.ArgumentParser(description="Load-test the Mastermind server.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--local",
+        action="store_true",
+        help="start a server in this process instead of connecting to one",
+    )
+    parser.add_argument("-n", type=int, default=4, help="sequence length")
+    parser.add_argument("-k", type=int, default=6, help="number of colors")
+    parser.add_argument("--player", default="random", help="player of every session")
+    parser.add_argument(
+        "--clients", type=int, default=100, help="concurrent connections"
+    )
+    parser.add_argument(
+        "--sessions", type=int, default=10, help="sessions played per connection"
+    )
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(_main(args))
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
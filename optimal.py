@@ -0,0 +1,372 @@
+import argparse
+import math
+import time
+
+import numpy as np
+
+from book import DecisionTree
+from codes import code_count
+from feedback import FeedbackTable, encode_feedback, outcome_count
+from strategies import get_strategy, partition_counts
+from symmetry import SymmetryTracker
+
+# What the search minimises: the total (hence expected) number of turns over every
+# hidden code, or the number of turns of the longest game
+OBJECTIVES = ("expected", "worst")
+
+# Name the trees are saved under, per objective
+STRATEGY_NAMES = {"expected": "optimal", "worst": "optimal_worst"}
+
+# Greedy heuristic ordering the moves tried at every node, per objective
+MOVE_ORDERING = {"expected": "expected_size", "worst": "minimax"}
+
+
+def lower_bounds(n, size, objective="expected"):
+    """
+    Returns lower bounds on the cost of solving candidate sets of every size.
+
+    A guess finishes at most one candidate and splits the rest into at most one
+    part per feedback other than the win, so no strategy beats one that always
+    guesses a candidate and splits the others as evenly as that allows.
+
+    Args:
+        n (int): Length of the sequence.
+        size (int): Largest set size needed.
+        objective (str, optional): "expected" for the total number of turns over
+            the set, "worst" for the turns of the longest game. Defaults to "expected".
+
+    Returns:
+        numpy.ndarray: The bound for every size from 0 to `size`.
+    """
+    # (n - 1, 1) cannot happen, and (n, 0) is the win
+    parts = (n + 1) * (n + 2) // 2 - 2
+    bounds = np.zeros(size + 1, dtype=np.int64)
+    if size >= 1:
+        bounds[1] = 1
+    for s in range(2, size + 1):
+        if objective == "expected":
+            q, r = divmod(s - 1, parts)
+            bounds[s] = s + r * bounds[q + 1] + (parts - r) * bounds[q]
+        else:
+            bounds[s] = 1 + bounds[-(-(s - 1) // parts)]
+    return bounds
+
+
+class OptimalSolver:
+    """
+    Exact game-tree search for the strategy with the fewest expected or worst-case
+    turns for a fixed (n, k).
+
+    The state of a game is the set of candidates still consistent with the feedback;
+    its cost does not depend on how it was reached, because a query already played
+    cannot split it again. The search is a depth-first branch and bound over those
+    sets:
+
+    - the guesses at a node are the symmetry classes of `symmetry.SymmetryTracker`,
+      ordered by the lower bound of their partition and then by a greedy heuristic,
+      so good moves are tried first and tighten the bound early;
+    - a guess is dropped as soon as the bounds of its parts, with the exact costs of
+      the parts searched so far, reach the best cost found at the node;
+    - costs and lower bounds of the sets searched are kept in a transposition table
+      keyed on the sorted packed codes of the set, so a set reached through
+      different feedback paths is only searched once.
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        objective (str): "expected" or "worst".
+        width (int or None): Guesses tried per node, best heuristic scores first;
+            None tries all of them and gives the optimal strategy.
+        table (FeedbackTable): Feedback of every pair of codes.
+        transpositions (dict): (cost, exact, guess) per candidate set; cost is a
+            lower bound when exact is False.
+        nodes (int): Number of candidate sets expanded.
+        hits (int): Number of lookups answered by the transposition table.
+    """
+
+    def __init__(self, n, k, objective="expected", table=None, width=None):
+        """
+        Initializes the solver.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            objective (str, optional): "expected" or "worst". Defaults to "expected".
+            table (FeedbackTable, optional): Feedback table for (n, k). Defaults to the
+                cached one, built if needed.
+            width (int, optional): Only try this many guesses per node.
+
+        Raises:
+            ValueError: If the objective is unknown.
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(
+                f"Unknown objective {objective!r}, choose one of {OBJECTIVES}"
+            )
+        self.n = n
+        self.k = k
+        self.objective = objective
+        self.width = width
+        self.table = table if table is not None else FeedbackTable.load_or_build(n, k)
+        self.order = get_strategy(MOVE_ORDERING[objective])
+        self.win = encode_feedback(n, n, 0)
+        self.bounds = lower_bounds(n, code_count(n, k), objective)
+        self.transpositions = {}
+        self.pools = {}
+        self.nodes = 0
+        self.hits = 0
+
+    def _trivial(self, size):
+        """
+        Returns the cost of a set of at most two candidates: guess one, then the other.
+        """
+        if self.objective == "expected":
+            return 2 * size - 1
+        return size
+
+    def _parts(self, guess, survivors):
+        """
+        Splits the candidates by the feedback they give to a guess.
+
+        Returns:
+            list: (feedback, sorted packed codes) of every part other than the win.
+        """
+        feedback = self.table.matrix[guess][survivors]
+        return [
+            (int(observed), survivors[feedback == observed])
+            for observed in np.unique(feedback)
+            if observed != self.win
+        ]
+
+    def _guesses(self, used):
+        """
+        Returns one guess per symmetry class left by the queries played.
+
+        The classes only depend on the symmetries the queries leave, which many sets
+        share, so the representatives are cached per group.
+        """
+        tracker = SymmetryTracker(self.n, self.k, used)
+        key = (tuple(map(tuple, tracker.blocks)), tuple(tracker.free_colors))
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = np.arange(code_count(self.n, self.k))
+            if tracker.group_order() > 1:
+                pool = tracker.representatives(pool)
+            self.pools[key] = pool
+        return pool
+
+    def _evaluate(self, guess, survivors, used, limit):
+        """
+        Returns the cost of playing a guess on a set, or a lower bound >= `limit`.
+        """
+        parts = sorted(
+            (part for _, part in self._parts(guess, survivors)),
+            key=len,
+            reverse=True,
+        )
+        bounds = [int(self.bounds[len(part)]) for part in parts]
+        used = used + [guess]
+
+        if self.objective == "expected":
+            total = len(survivors) + sum(bounds)
+            # Largest parts first: they carry most of the cost
+            for part, bound in zip(parts, bounds):
+                if total >= limit:
+                    return total
+                value = self._search(part, used, limit - (total - bound))
+                total += value - bound
+            return total
+
+        worst = 1 + max(bounds, default=0)
+        for part in parts:
+            if worst >= limit:
+                return worst
+            worst = max(worst, 1 + self._search(part, used, limit - 1))
+        return worst
+
+    def _search(self, survivors, used, limit):
+        """
+        Returns the cost of a candidate set if it is below `limit`, otherwise a lower
+        bound that is at least `limit`.
+
+        Args:
+            survivors (numpy.ndarray): Sorted packed codes of the candidates.
+            used (list): Queries played to reach the set, for the symmetry reduction.
+            limit (float): Cost above which the exact value is not needed.
+
+        Returns:
+            int: The cost, or a lower bound on it.
+        """
+        size = len(survivors)
+        if size <= 2:
+            return self._trivial(size)
+
+        key = survivors.tobytes()
+        entry = self.transpositions.get(key)
+        lower = int(self.bounds[size])
+        if entry is not None:
+            self.hits += 1
+            if entry[1] or entry[0] >= limit:
+                return entry[0]
+            lower = entry[0]
+        if lower >= limit:
+            return lower
+        self.nodes += 1
+
+        pool = self._guesses(used)
+        counts = partition_counts(self.n, self.k, pool, survivors, self.table)
+        # A guess that leaves every candidate together gains nothing
+        splits = counts.max(axis=1) < size
+        pool, counts = pool[splits], counts[splits]
+
+        rest = self.bounds[counts]
+        rest[:, self.win] = 0
+        if self.objective == "expected":
+            bounds = size + rest.sum(axis=1)
+        else:
+            bounds = 1 + rest.max(axis=1)
+        scores = self.order(counts)
+        candidate = counts[:, self.win] > 0
+
+        order = np.lexsort((pool, ~candidate, scores))
+        if self.width is not None:
+            order = order[: self.width]
+        order = order[np.argsort(bounds[order], kind="stable")]
+
+        best = limit
+        best_guess = None
+        for i in order:
+            if bounds[i] >= best:
+                break
+            value = self._evaluate(int(pool[i]), survivors, used, best)
+            if value < best:
+                best = value
+                best_guess = int(pool[i])
+
+        if best_guess is None:
+            self.transpositions[key] = (max(lower, limit), False, None)
+            return max(lower, limit)
+        self.transpositions[key] = (best, True, best_guess)
+        return best
+
+    def _best_guess(self, survivors, used):
+        """
+        Returns the optimal guess for a candidate set, searching it if needed.
+        """
+        if len(survivors) <= 2:
+            return int(survivors[0])
+        entry = self.transpositions.get(survivors.tobytes())
+        if entry is None or not entry[1]:
+            self._search(survivors, used, math.inf)
+            entry = self.transpositions[survivors.tobytes()]
+        return entry[2]
+
+    def solve(self):
+        """
+        Searches the whole game.
+
+        Returns:
+            int: The optimal total number of turns over every hidden code for the
+            "expected" objective, or the optimal worst-case number of turns.
+        """
+        return self._search(np.arange(code_count(self.n, self.k)), [], math.inf)
+
+    def tree(self):
+        """
+        Exports the optimal strategy as a `book.DecisionTree`, searching first if
+        needed.
+
+        Returns:
+            DecisionTree: The full tree, named after the objective (and the width,
+            if the search was limited).
+        """
+        guesses = []
+        children = []
+
+        def visit(survivors, used):
+            node = len(guesses)
+            guess = self._best_guess(survivors, used)
+            guesses.append(guess)
+            children.append(np.full(outcome_count(self.n), -1, dtype=np.int32))
+            for observed, part in self._parts(guess, survivors):
+                children[node][observed] = visit(part, used + [guess])
+            return node
+
+        visit(np.arange(code_count(self.n, self.k)), [])
+
+        strategy = STRATEGY_NAMES[self.objective]
+        if self.width is not None:
+            strategy = f"{strategy}_w{self.width}"
+        return DecisionTree(
+            self.n,
+            self.k,
+            strategy,
+            None,
+            np.array(guesses, dtype=np.int32),
+            np.array(children, dtype=np.int32),
+        )
+
+
+def tree_turns(tree):
+    """
+    Plays a full decision tree against every hidden code.
+
+    Args:
+        tree (DecisionTree): A tree without cut-off paths.
+
+    Returns:
+        numpy.ndarray: The number of turns for every hidden code, by row index.
+    """
+    table = FeedbackTable.load_or_build(tree.n, tree.k)
+    win = encode_feedback(tree.n, tree.n, 0)
+    turns = np.zeros(code_count(tree.n, tree.k), dtype=np.int64)
+
+    def visit(node, survivors, depth):
+        guess = tree.guesses[node]
+        feedback = table.matrix[guess][survivors]
+        turns[survivors[feedback == win]] = depth
+        for observed in np.unique(feedback):
+            if observed != win:
+                child = tree.children[node, observed]
+                visit(child, survivors[feedback == observed], depth + 1)
+
+    visit(0, np.arange(len(turns)), 1)
+    return turns
+
+
+def main():
+    """
+    Command-line entry point that solves (n, k) and saves the strategy into the cache.
+    """
+    parser = argparse.ArgumentParser(description="Compute an optimal strategy.")
+    parser.add_argument("-n", type=int, default=3, help="sequence length")
+    parser.add_argument("-k", type=int, default=4, help="number of colors")
+    parser.add_argument(
+        "--objective", choices=OBJECTIVES, default="expected", help="what to minimise"
+    )
+    parser.add_argument(
+        "--width", type=int, help="only try this many guesses per node (not optimal)"
+    )
+    parser.add_argument("--cache-dir", help="directory holding the tables and trees")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = FeedbackTable.load_or_build(args.n, args.k, args.cache_dir)
+    solver = OptimalSolver(args.n, args.k, args.objective, table, args.width)
+    cost = solver.solve()
+    tree = solver.tree()
+    path = DecisionTree.path_for(args.n, args.k, tree.strategy, None, args.cache_dir)
+    tree.save(path)
+
+    turns = tree_turns(tree)
+    print(f"Cost: {cost} ({args.objective})")
+    print(f"Turns: mean {turns.mean():.4f}, max {turns.max()}")
+    print(
+        f"Searched {solver.nodes} sets ({solver.hits} table hits)"
+        f" in {time.perf_counter() - start:.1f} s"
+    )
+    print(f"{len(tree)} nodes in {path}")
+
+
+if __name__ == "__main__":
+    main()
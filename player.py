@@ -1,6 +1,17 @@
 import random
+import time
+from collections import namedtuple
 
+import numpy as np
+
+import instrumentation
+from candidates import CandidateSet, consistent_codes
+from codes import QueryHistory, all_codes, code_count, decode, encode, encode_many
+from constraint_solver import find_consistent
+from feedback import encode_feedback
 from simple_interface import Interface
+from strategies import best_guess, get_strategy, partition_counts
+from symmetry import SymmetryTracker
 
 
 class AutoPlayer:
@@ -9,14 +20,16 @@ class AutoPlayer:
     """
 
     def __init__(self):
-        self.used_queries = []
-        self.interface = Interface()
+        self.used_queries = None
 
     def get_query(self, n, k):
         """
         Generates a random query of length n with values in the range [1, k].
         Ensures that the query is unique.
 
+        The query is drawn uniformly from the codes not used yet, so no attempts are
+        wasted on duplicates.
+
         Args:
             n (int): Length of the query sequence.
             k (int): Number of colors.
@@ -25,26 +38,27 @@ class AutoPlayer:
             list: A unique query sequence.
 
         Raises:
-            RuntimeError: If a unique query cannot be generated within the maximum attempts.
-        """
-        # Calculate maximum possible attempts to avoid infinite recursion
-        max_possibilities = k**n
-        attempts = 0
-        max_attempts = min(
-            max_possibilities, 100
-        )  # Limit attempts to avoid excessive recursion
-
-        while attempts < max_attempts:
-            query = [random.randint(1, k) for _ in range(n)]
-            if query in self.used_queries:
-                self.interface.is_query_duplicated()
-            else:
-                self.used_queries.append(query)
-                return query
-            attempts += 1
+            RuntimeError: If every possible query has already been used.
+        """
+        if self.used_queries is None or (n, k) != (
+            self.used_queries.n,
+            self.used_queries.k,
+        ):
+            self.used_queries = QueryHistory(n, k)
 
-        # If we can't find a unique query after max attempts
-        raise RuntimeError("Unable to generate unique query after maximum attempts")
+        packed = self.used_queries.sample_unused()
+        self.used_queries.add(packed)
+        return decode(packed, n, k)
+
+    def receive_feedback(self, query, correct_position_and_color, correct_color):
+        """
+        Receives the judge's feedback for a query. Random guessing ignores it.
+
+        Args:
+            query (list): The query that was checked.
+            correct_position_and_color (int): Number of exact matches.
+            correct_color (int): Number of color matches (excluding position).
+        """
 
 
 class ManualPlayer:
@@ -53,7 +67,7 @@ class ManualPlayer:
     """
 
     def __init__(self):
-        self.used_queries = []
+        self.used_queries = None
         self.interface = Interface()
 
     def get_query(self, n, k):
@@ -68,13 +82,722 @@ class ManualPlayer:
         Returns:
             list: A unique query sequence.
         """
+        if self.used_queries is None or (n, k) != (
+            self.used_queries.n,
+            self.used_queries.k,
+        ):
+            self.used_queries = QueryHistory(n, k)
+
         while True:
             query = self.interface.get_query_seq_from_the_user(n, k)
-            if query in self.used_queries:
-                self.interface.is_query_duplicated()
-            else:
-                self.used_queries.append(query)
+            if self.used_queries.add(query):
                 return query
+            self.interface.is_query_duplicated()
+
+    def receive_feedback(self, query, correct_position_and_color, correct_color):
+        """
+        Receives the judge's feedback for a query. The user reads it from the interface.
+
+        Args:
+            query (list): The query that was checked.
+            correct_position_and_color (int): Number of exact matches.
+            correct_color (int): Number of color matches (excluding position).
+        """
+
+
+class SolverPlayer:
+    """
+    Represents an automated player that picks guesses with a scoring heuristic.
+
+    The player keeps the set of codes still consistent with every feedback received
+    and scores candidate guesses by how they would partition it, using one of the
+    heuristics registered in `strategies`. After each feedback only the survivors
+    of the previous turn are filtered.
+
+    When a compiled `book.DecisionTree` for the same (n, k) is given, moves are
+    looked up in the tree while the game stays inside it, and the survivors are only
+    filtered once the player has to fall back to scoring.
+
+    With symmetry reduction enabled, guesses that are equivalent under the symmetries
+    tracked by `symmetry.SymmetryTracker` are scored once. The chosen guesses are the
+    same as without the reduction.
+
+    Attributes:
+        MAX_CODES (int): Largest code space the player accepts.
+        MAX_PAIRS (int): Budget of (guess, survivor) pairs scored per turn.
+        reduction_ratios (list): Guess pool size divided by the number of guesses
+            actually scored, for every scored turn of the current game.
+    """
+
+    MAX_CODES = 1 << 20
+    MAX_PAIRS = 1 << 21
+
+    def __init__(self, strategy="minimax", table=None, book=None, symmetry=True):
+        """
+        Initializes the player.
+
+        Args:
+            strategy (str, optional): Name of a registered heuristic. Defaults to "minimax".
+            table (FeedbackTable, optional): Precomputed feedback used instead of `Judge`.
+            book (DecisionTree, optional): Compiled moves of the same strategy.
+            symmetry (bool, optional): Score one guess per symmetry class. Defaults to True.
+
+        Raises:
+            ValueError: If the strategy is not registered.
+        """
+        self.used_queries = None
+        self.strategy = strategy
+        self.score = get_strategy(strategy)
+        self.table = table
+        self.book = book
+        self.symmetry = symmetry
+        self.tracker = None
+        self.reduction_ratios = []
+        self.n = None
+        self.k = None
+        self.candidates = None
+        self.node = None
+        self.pending = []
+
+    @classmethod
+    def supports(cls, n, k):
+        """
+        Checks whether the code space is small enough for the player.
+
+        Args:
+            n (int): Length of the query sequence.
+            k (int): Number of colors.
+
+        Returns:
+            bool: True if the player can be used for (n, k).
+        """
+        return code_count(n, k) <= cls.MAX_CODES
+
+    def _reset(self, n, k):
+        """
+        Starts a new game with every code as a candidate.
+
+        Args:
+            n (int): Length of the query sequence.
+            k (int): Number of colors.
+
+        Raises:
+            ValueError: If the code space is too large for the player.
+        """
+        if not self.supports(n, k):
+            raise ValueError(f"Code space {k}^{n} is too large for a solver player")
+
+        self.n = n
+        self.k = k
+        self.used_queries = QueryHistory(n, k)
+        self.candidates = CandidateSet(n, k, self.table)
+        self.tracker = SymmetryTracker(n, k)
+        self.reduction_ratios = []
+        self.pending = []
+        if self.book is not None and (self.book.n, self.book.k) == (n, k):
+            self.node = 0
+        else:
+            self.node = None
+
+    @property
+    def survivors(self):
+        """numpy.ndarray: Packed codes still consistent with the feedback applied."""
+        return self.candidates.survivors()
+
+    def _guess_pool(self):
+        """
+        Returns the guesses to score this turn, bounded by `MAX_PAIRS`.
+
+        Every code is considered while the budget allows it, then only the survivors,
+        then a random sample of the survivors.
+
+        Returns:
+            numpy.ndarray: Row indices of the guesses, excluding already used queries.
+        """
+        size = len(self.survivors)
+        if code_count(self.n, self.k) * size <= self.MAX_PAIRS:
+            pool = np.arange(code_count(self.n, self.k))
+        elif size * size <= self.MAX_PAIRS:
+            pool = self.survivors
+        else:
+            sample = random.sample(range(size), max(1, self.MAX_PAIRS // size))
+            pool = self.survivors[np.sort(sample)]
+
+        return pool[~self.used_queries.contains_many(pool)]
+
+    def _choose_guess(self):
+        """
+        Scores the guess pool against the current survivors and picks the best guess.
+
+        Returns:
+            int: Row index of the chosen guess.
+
+        Raises:
+            RuntimeError: If no code is consistent with the feedback received.
+        """
+        if len(self.survivors) == 0:
+            raise RuntimeError("No code is consistent with the feedback received")
+        if len(self.survivors) <= 2:
+            return int(self.survivors[0])
+
+        pool = self._guess_pool()
+        if self.symmetry:
+            size = len(pool)
+            pool = self.tracker.representatives(pool)
+            self.reduction_ratios.append(size / max(1, len(pool)))
+        counts = partition_counts(self.n, self.k, pool, self.survivors, self.table)
+        return best_guess(self.score(counts), pool, self.survivors)
+
+    def get_query(self, n, k):
+        """
+        Chooses the guess with the best heuristic score.
+
+        Args:
+            n (int): Length of the query sequence.
+            k (int): Number of colors.
+
+        Returns:
+            list: The chosen query sequence.
+
+        Raises:
+            ValueError: If the code space is too large for the player.
+            RuntimeError: If no code is consistent with the feedback received.
+        """
+        if self.candidates is None or (n, k) != (self.n, self.k):
+            self._reset(n, k)
+
+        if self.node is not None:
+            guess = self.book.guesses[self.node]
+        else:
+            # Catch up on the feedback received while following the book
+            for feedback in self.pending:
+                self.candidates.apply(*feedback)
+            self.pending = []
+            guess = self._choose_guess()
+
+        self.used_queries.add(int(guess))
+        return [int(color) for color in all_codes(n, k)[guess]]
+
+    def receive_feedback(self, query, correct_position_and_color, correct_color):
+        """
+        Keeps only the survivors that would have produced the same feedback.
+
+        While following the book this only moves to the next node; the survivors are
+        filtered when the player leaves the book.
+
+        Args:
+            query (list): The query that was checked.
+            correct_position_and_color (int): Number of exact matches.
+            correct_color (int): Number of color matches (excluding position).
+        """
+        self.tracker.add_query(query)
+
+        if self.node is not None:
+            self.pending.append((query, correct_position_and_color, correct_color))
+            observed = encode_feedback(self.n, correct_position_and_color, correct_color)
+            child = self.book.children[self.node, observed]
+            self.node = int(child) if child >= 0 else None
+            return
+
+        self.candidates.apply(query, correct_position_and_color, correct_color)
+
+
+class MinimaxPlayer(SolverPlayer):
+    """
+    Represents an automated player that plays Knuth's minimax strategy.
+
+    It picks the guess whose worst-case feedback leaves the fewest candidates,
+    preferring guesses that can still be the hidden sequence on ties.
+    """
+
+    def __init__(self, table=None, book=None):
+        """
+        Initializes the player.
+
+        Args:
+            table (FeedbackTable, optional): Precomputed feedback used instead of `Judge`.
+            book (DecisionTree, optional): Compiled minimax moves.
+        """
+        super().__init__("minimax", table, book)
+
+
+class SamplingPlayer:
+    """
+    Represents an automated player for code spaces too large to enumerate.
+
+    Consistent codes are generated lazily with `candidates.consistent_codes`, and
+    only a bounded sample of them is kept and scored against itself with a
+    registered heuristic. Memory use does not grow with k ** n.
+
+    Attributes:
+        MAX_CODES (int): Largest code space the interactive games use the player for.
+        SAMPLE_SIZE (int): Default number of consistent codes sampled per turn.
+    """
+
+    MAX_CODES = 1 << 24
+    SAMPLE_SIZE = 256
+
+    def __init__(self, strategy="minimax", sample_size=SAMPLE_SIZE):
+        """
+        Initializes the player.
+
+        Args:
+            strategy (str, optional): Name of a registered heuristic. Defaults to "minimax".
+            sample_size (int, optional): Number of consistent codes scored per turn.
+
+        Raises:
+            ValueError: If the strategy is not registered.
+        """
+        self.strategy = strategy
+        self.score = get_strategy(strategy)
+        self.sample_size = sample_size
+        self.used_queries = None
+        self.history = []
+
+    def get_query(self, n, k):
+        """
+        Chooses the best guess among a sample of the consistent codes.
+
+        Args:
+            n (int): Length of the query sequence.
+            k (int): Number of colors.
+
+        Returns:
+            list: The chosen query sequence.
+
+        Raises:
+            RuntimeError: If no code is consistent with the feedback received.
+        """
+        if self.used_queries is None or (n, k) != (
+            self.used_queries.n,
+            self.used_queries.k,
+        ):
+            self.used_queries = QueryHistory(n, k)
+            self.history = []
+
+        sample = []
+        taken = 0
+        for chunk in consistent_codes(n, k, self.history, rng=random):
+            sample.append(chunk[: self.sample_size - taken])
+            taken += len(sample[-1])
+            if taken >= self.sample_size:
+                break
+
+        if not taken:
+            raise RuntimeError("No code is consistent with the feedback received")
+
+        packed = np.unique(encode_many(np.concatenate(sample), k))
+        if len(packed) <= 2:
+            guess = int(packed[0])
+        else:
+            counts = partition_counts(n, k, packed, packed)
+            guess = best_guess(self.score(counts), packed, packed)
+
+        self.used_queries.add(guess)
+        return decode(guess, n, k)
+
+    def receive_feedback(self, query, correct_position_and_color, correct_color):
+        """
+        Records the feedback as a constraint for the next candidate generation.
+
+        Args:
+            query (list): The query that was checked.
+            correct_position_and_color (int): Number of exact matches.
+            correct_color (int): Number of color matches (excluding position).
+        """
+        self.history.append((list(query), correct_position_and_color, correct_color))
+
+
+class ConstraintPlayer:
+    """
+    Represents an automated player for very large code spaces.
+
+    Every feedback received becomes a constraint, and each query is the first code
+    found by `constraint_solver.find_consistent` that satisfies all of them. The
+    search of each move is bounded by a time budget; if it runs out before finding
+    a consistent code, a random unused code is played instead, which is usually not
+    consistent. Such moves are reported by `consistent` and counted in `fallbacks`
+    and in the "constraint.fallbacks" instrumentation counter.
+
+    Attributes:
+        BUDGET (float): Default search time per move, in seconds.
+        budget (float): Search time per move, in seconds.
+        max_nodes (int or None): Search node budget per move, if any.
+        consistent (bool or None): Whether the last query was consistent with the
+            feedback received before it.
+        fallbacks (int): Number of moves of the current game that fell back to a
+            random code.
+    """
+
+    BUDGET = 0.1
+
+    def __init__(self, budget=BUDGET, max_nodes=None):
+        """
+        Initializes the player.
+
+        Args:
+            budget (float, optional): Search time per move, in seconds.
+            max_nodes (int, optional): Search node budget per move, on top of the time
+                budget.
+        """
+        self.budget = budget
+        self.max_nodes = max_nodes
+        self.used_queries = None
+        self.history = []
+        self.consistent = None
+        self.fallbacks = 0
+
+    def get_query(self, n, k):
+        """
+        Finds a query consistent with every feedback received so far.
+
+        Args:
+            n (int): Length of the query sequence.
+            k (int): Number of colors.
+
+        Returns:
+            list: The chosen query sequence.
+        """
+        if self.used_queries is None or (n, k) != (
+            self.used_queries.n,
+            self.used_queries.k,
+        ):
+            self.used_queries = QueryHistory(n, k)
+            self.history = []
+            self.fallbacks = 0
+
+        deadline = time.perf_counter() + self.budget
+        query = find_consistent(n, k, self.history, random, self.max_nodes, deadline)
+        self.consistent = query is not None and query not in self.used_queries
+        if not self.consistent:
+            self.fallbacks += 1
+            instrumentation.count("constraint.fallbacks")
+            query = decode(self.used_queries.sample_unused(), n, k)
+
+        self.used_queries.add(query)
+        return query
+
+    def receive_feedback(self, query, correct_position_and_color, correct_color):
+        """
+        Records the feedback as a constraint for the next search.
+
+        Args:
+            query (list): The query that was checked.
+            correct_position_and_color (int): Number of exact matches.
+            correct_color (int): Number of color matches (excluding position).
+        """
+        self.history.append((list(query), correct_position_and_color, correct_color))
+
+
+# Quality reached by one move of `AnytimePlayer`: the time taken, whether the guess
+# is consistent with the feedback, the consistent codes it was scored against (and
+# whether they are all of them), and how many of the unused codes were scored
+MoveQuality = namedtuple(
+    "MoveQuality",
+    ["seconds", "consistent", "sample", "complete", "scored", "pool"],
+)
+
+
+class AnytimePlayer:
+    """
+    Represents an automated player answering within a fixed time per move.
+
+    Every move first gathers consistent codes, exactly for small code spaces and
+    with randomized `constraint_solver.find_consistent` searches otherwise, and
+    holds one of them as the answer; the search for the first one may take the
+    whole budget. Guesses are then scored against those codes with a registered
+    heuristic in small batches, consistent codes first and then, in small spaces,
+    other unused codes, until the budget runs out; the best guess scored so far is
+    played. The latency of a move is the budget plus at most one batch, at any
+    (n, k).
+
+    Codes gathered by searching are kept as arrays of colors rather than packed
+    codes, which overflow NumPy integers once k^n exceeds 2^63.
+
+    Attributes:
+        EXACT_CODES (int): Largest code space whose consistent codes are tracked
+            exactly.
+        SAMPLE_SIZE (int): Maximum number of consistent codes guesses are scored
+            against.
+        BATCH_PAIRS (int): Number of (guess, code) pairs scored per batch.
+        SAMPLE_SHARE (float): Share of the budget spent gathering consistent codes.
+        DUPLICATE_LIMIT (int): Searches returning a code already gathered before the
+            gathering stops.
+        budget (float): Time allowed per move, in seconds.
+        quality (MoveQuality or None): Quality reached by the last move.
+        qualities (list): `MoveQuality` of every move of the current game.
+    """
+
+    EXACT_CODES = 1 << 16
+    SAMPLE_SIZE = 1024
+    BATCH_PAIRS = 1 << 14
+    SAMPLE_SHARE = 0.25
+    DUPLICATE_LIMIT = 8
+
+    def __init__(self, budget=0.1, strategy="minimax", table=None):
+        """
+        Initializes the player.
+
+        Args:
+            budget (float, optional): Time allowed per move, in seconds. Defaults to
+                0.1.
+            strategy (str, optional): Name of a registered heuristic. Defaults to
+                "minimax".
+            table (FeedbackTable, optional): Precomputed feedback used instead of
+                `Judge`.
+
+        Raises:
+            ValueError: If the strategy is not registered.
+        """
+        self.budget = budget
+        self.strategy = strategy
+        self.score = get_strategy(strategy)
+        self.table = table
+        self.n = None
+        self.k = None
+        self.used_queries = None
+        self.candidates = None
+        self.history = []
+        self.quality = None
+        self.qualities = []
+
+    def _reset(self, n, k):
+        """
+        Starts a new game.
+
+        Args:
+            n (int): Length of the query sequence.
+            k (int): Number of colors.
+        """
+        self.n = n
+        self.k = k
+        self.used_queries = QueryHistory(n, k)
+        self.history = []
+        self.qualities = []
+        if code_count(n, k) <= self.EXACT_CODES:
+            table = self.table
+            if table is not None and (table.n, table.k) != (n, k):
+                table = None
+            self.candidates = CandidateSet(n, k, table)
+        else:
+            self.candidates = None
+
+    def _sample(self, deadline, first_deadline):
+        """
+        Gathers the consistent codes the guesses are scored against.
+
+        Args:
+            deadline (float): `time.perf_counter()` value to stop searching at.
+            first_deadline (float): Later value to stop at while nothing is found.
+
+        Returns:
+            tuple: The codes, and whether they are every consistent code. Codes
+            tracked exactly are sorted packed codes; searched ones are an (S, n) array
+            of colors, in packed code order.
+        """
+        if self.candidates is not None:
+            survivors = self.candidates.survivors()
+            if len(survivors) <= self.SAMPLE_SIZE:
+                return survivors, True
+            sample = random.sample(range(len(survivors)), self.SAMPLE_SIZE)
+            return survivors[np.sort(sample)], False
+
+        # Restarted randomized searches give different codes; once they keep finding
+        # the same ones, few are left
+        found = {}
+        duplicates = 0
+        while len(found) < self.SAMPLE_SIZE and duplicates < self.DUPLICATE_LIMIT:
+            code = find_consistent(
+                self.n,
+                self.k,
+                self.history,
+                random,
+                deadline=deadline if found else first_deadline,
+            )
+            if code is None:
+                break
+            packed = encode(code, self.k)
+            duplicates += packed in found
+            found[packed] = code
+        codes = [found[packed] for packed in sorted(found)]
+        return np.array(codes, dtype=np.uint8).reshape(-1, self.n), False
+
+    def _pool(self, sample):
+        """
+        Yields batches of guesses: the consistent codes, then other unused codes.
+
+        Other codes are only scored in spaces small enough to track exactly; scored
+        against a partial sample they tend to look better than they are.
+
+        Args:
+            sample (numpy.ndarray): Consistent codes, as returned by `_sample`.
+
+        Yields:
+            numpy.ndarray: The next guesses, in the same form as `sample`.
+        """
+        rows = max(1, self.BATCH_PAIRS // len(sample))
+        for start in range(0, len(sample), rows):
+            yield sample[start : start + rows]
+
+        if self.candidates is None:
+            return
+        others = np.arange(code_count(self.n, self.k))
+        others = others[~np.isin(others, sample)]
+        others = others[~self.used_queries.contains_many(others)]
+        for start in range(0, len(others), rows):
+            yield others[start : start + rows]
+
+    def get_query(self, n, k):
+        """
+        Chooses the best guess found within the time budget.
+
+        Args:
+            n (int): Length of the query sequence.
+            k (int): Number of colors.
+
+        Returns:
+            list: The chosen query sequence.
+        """
+        start = time.perf_counter()
+        deadline = start + self.budget
+        if self.used_queries is None or (n, k) != (self.n, self.k):
+            self._reset(n, k)
+
+        sample, complete = self._sample(
+            start + self.budget * self.SAMPLE_SHARE, deadline
+        )
+        scored = 0
+        consistent = len(sample) > 0
+        if len(sample) == 0:
+            # Nothing consistent found in time: play any unused code
+            guess = self.used_queries.sample_unused()
+        elif len(sample) <= 2:
+            guess = sample[0]
+        else:
+            # The first consistent code is the answer until something better is scored
+            guess = sample[0]
+            table = self.candidates.table if self.candidates is not None else None
+            guesses = []
+            scores = []
+            for batch in self._pool(sample):
+                if time.perf_counter() >= deadline:
+                    break
+                if len(batch) == 0:
+                    continue
+                counts = partition_counts(n, k, batch, sample, table)
+                guesses.append(batch)
+                scores.append(self.score(counts))
+                scored += len(batch)
+            if guesses and self.candidates is not None:
+                guesses = np.concatenate(guesses)
+                guess = best_guess(np.concatenate(scores), guesses, sample)
+                consistent = bool(np.isin(guess, sample))
+            elif guesses:
+                # Only searched codes were scored, in packed code order, so the first
+                # best one is what `best_guess` would pick
+                guess = sample[np.argmin(np.concatenate(scores))]
+
+        self.quality = MoveQuality(
+            time.perf_counter() - start,
+            consistent,
+            len(sample),
+            complete,
+            scored,
+            code_count(n, k) - len(self.used_queries),
+        )
+        self.qualities.append(self.quality)
+        instrumentation.count("anytime.scored", scored)
+
+        if isinstance(guess, np.ndarray):
+            query = [int(color) for color in guess]
+        else:
+            query = decode(int(guess), n, k)
+        self.used_queries.add(query)
+        return query
+
+    def receive_feedback(self, query, correct_position_and_color, correct_color):
+        """
+        Records the feedback for the next move.
+
+        Args:
+            query (list): The query that was checked.
+            correct_position_and_color (int): Number of exact matches.
+            correct_color (int): Number of color matches (excluding position).
+        """
+        self.history.append((list(query), correct_position_and_color, correct_color))
+        if self.candidates is not None:
+            self.candidates.apply(query, correct_position_and_color, correct_color)
+
+
+def make_player(name, table=None, book=None):
+    """
+    Creates an automated player from its name.
+
+    Args:
+        name (str): "random" for `AutoPlayer`, "sampling" for `SamplingPlayer`,
+            "constraint" for `ConstraintPlayer`, "anytime" for `AnytimePlayer`,
+            the name of a strategy computed by `optimal`, otherwise the name of a
+            registered strategy.
+        table (FeedbackTable, optional): Precomputed feedback for solver players.
+        book (DecisionTree, optional): Compiled moves for solver players. Optimal
+            strategies play their tree and fall back to their move ordering off it.
+
+    Returns:
+        AutoPlayer, SamplingPlayer, ConstraintPlayer, AnytimePlayer or SolverPlayer:
+            A fresh player.
+
+    Raises:
+        ValueError: If the name is not one of the above or a registered strategy.
+    """
+    if name == "random":
+        return AutoPlayer()
+    if name == "sampling":
+        return SamplingPlayer()
+    if name == "constraint":
+        return ConstraintPlayer()
+    if name == "anytime":
+        return AnytimePlayer(table=table)
+
+    # Imported here: optimal depends on book, which depends on this module
+    from optimal import MOVE_ORDERING, STRATEGY_NAMES
+
+    for objective, strategy in STRATEGY_NAMES.items():
+        if name == strategy:
+            return SolverPlayer(MOVE_ORDERING[objective], table, book)
+    return SolverPlayer(name, table, book)
+
+
+def make_auto_player(n, k, budget=None):
+    """
+    Creates the automated player used by the interactive games for (n, k).
+
+    With a time budget the anytime player is used, whatever the size. Otherwise the
+    minimax solver is used when the code space is small enough, together with the
+    cached optimal tree if one was computed by `optimal`, else its own cached
+    decision tree if one was compiled. Larger spaces use the sampling player, and the
+    largest ones the constraint player.
+
+    Args:
+        n (int): Length of the query sequence.
+        k (int): Number of colors.
+        budget (float, optional): Time allowed per move, in seconds.
+
+    Returns:
+        MinimaxPlayer, SamplingPlayer, ConstraintPlayer or AnytimePlayer: A fresh player.
+    """
+    from book import DecisionTree
+
+    if budget is not None:
+        return AnytimePlayer(budget)
+
+    if MinimaxPlayer.supports(n, k):
+        book = DecisionTree.find(n, k, "optimal")
+        if book is None:
+            book = DecisionTree.find(n, k, "minimax")
+        return MinimaxPlayer(book=book)
+    if code_count(n, k) <= SamplingPlayer.MAX_CODES:
+        return SamplingPlayer()
+    return ConstraintPlayer()
 
 
 # o = AutoPlayer()
@@ -1,72 +1,288 @@
+import argparse
 import sys
-
-from PyQt5.QtCore import QSize, Qt
+import time
+
+from PyQt5.QtCore import (
+    QObject,
+    QRect,
+    QSize,
+    Qt,
+    QThread,
+    QTimer,
+    pyqtSignal,
+    pyqtSlot,
+)
 from PyQt5.QtGui import QBrush, QColor, QPainter, QPen
 from PyQt5.QtWidgets import (
     QApplication,
-    QGridLayout,
     QHBoxLayout,
     QInputDialog,
     QLabel,
     QMainWindow,
     QMessageBox,
+    QProgressBar,
     QPushButton,
     QRadioButton,
+    QScrollArea,
     QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 
+import instrumentation
+from codes import as_sequence
 from judge import Judge
-from player import AutoPlayer
+from player import make_auto_player
+from replay import ReplayLog, ReplayWriter
+
+
+class SolverWorker(QObject):
+    """
+    Computes automated moves on a background thread.
+
+    Each request carries the generation number of the game it belongs to, which is
+    sent back with the result so the GUI can drop moves of games that were replaced.
+
+    Signals:
+        moveReady (int, object): Generation number and the computed guess.
+        moveFailed (int, str): Generation number and the error message.
+    """
+
+    moveReady = pyqtSignal(int, object)
+    moveFailed = pyqtSignal(int, str)
+
+    @pyqtSlot(int, object, int, int)
+    def computeMove(self, generation, player, seq_l, k):
+        """
+        Asks the player for its next query and reports the result with a signal.
+
+        Args:
+            generation (int): Generation number of the game requesting the move.
+            player: The automated player of that game.
+            seq_l (int): The length of the sequence to guess.
+            k (int): The number of colors.
+        """
+        try:
+            with instrumentation.span("player.get_query"):
+                guess = player.get_query(seq_l, k)
+        except Exception as error:
+            self.moveFailed.emit(generation, str(error))
+            return
+        self.moveReady.emit(generation, guess)
 
 
-class PegWidget(QWidget):
+class BoardCanvas(QWidget):
     """
-    A custom QWidget representing a colored peg in a Mastermind game.
+    Paints every row of guesses and feedback pegs of a Mastermind board.
+
+    All pegs are drawn by this one widget. Changing a peg only schedules a repaint of
+    the region it covers, and a paint event only draws the rows it intersects, so big
+    boards stay cheap to update and scroll.
 
     Attributes:
-        color (QColor): The color of the peg. Default is Qt.gray.
-        size (int): The size of the peg. Default is 30.
+        PEG_SIZE (int): Diameter of a guess peg, in pixels.
+        FEEDBACK_SIZE (int): Diameter of a feedback peg, in pixels.
+        SPACING (int): Gap between pegs and around the board, in pixels.
+        seq_l (int): Number of pegs per row.
+        n (int): Number of rows.
+        pegs (list): Color number (from 1) of every peg per row, 0 for an empty peg.
+        feedback (list): (exact, color) of every row, or None before it is judged.
     """
 
-    def __init__(self, color=Qt.gray, size=30):
+    PEG_SIZE = 30
+    FEEDBACK_SIZE = 15
+    SPACING = 6
+
+    def __init__(self, colors, seq_l, n):
+        """
+        Initializes an empty board.
+
+        Args:
+            colors (list): QColor of every color number, starting at 1.
+            seq_l (int): Number of pegs per row.
+            n (int): Number of rows.
+        """
         super().__init__()
-        self.color = color
-        self.setFixedSize(QSize(size, size))
+        # Index 0 is the empty peg
+        self.brushes = [QBrush(QColor(Qt.gray))] + [QBrush(c) for c in colors]
+        self.exact_brush = QBrush(QColor(Qt.black))
+        self.color_brush = QBrush(QColor(Qt.white))
+        self.reset(seq_l, n)
 
-    def paintEvent(self, event):
+    def reset(self, seq_l, n):
+        """
+        Empties the board and resizes it for a new game.
+
+        Args:
+            seq_l (int): Number of pegs per row.
+            n (int): Number of rows.
+        """
+        self.seq_l = seq_l
+        self.n = n
+        self.pegs = [[0] * seq_l for _ in range(n)]
+        self.feedback = [None] * n
+        # Feedback pegs are laid out on two lines, as on a physical board
+        self.feedback_columns = (seq_l + 1) // 2
+        self.setFixedSize(self.sizeHint())
+        self.update()
+
+    def sizeHint(self):
+        feedback_width = self.feedback_columns * self.FEEDBACK_SIZE
+        return QSize(
+            self.SPACING
+            + self.seq_l * (self.PEG_SIZE + self.SPACING)
+            + feedback_width
+            + self.SPACING,
+            self.SPACING + self.n * self.rowHeight(),
+        )
+
+    def rowHeight(self):
+        """
+        Returns the height of a row, spacing included.
+
+        Returns:
+            int: The height in pixels.
         """
-        Handles the paint event for the widget.
+        return self.PEG_SIZE + self.SPACING
 
-        This method is called whenever the widget needs to be repainted. It uses
-        QPainter to draw an ellipse with the specified color and dimensions.
+    def rowRect(self, row):
+        """
+        Returns the area covered by a row.
 
         Args:
-            event (QPaintEvent): The paint event that triggered this method.
+            row (int): Index of the row.
+
+        Returns:
+            QRect: The area, in widget coordinates.
         """
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
+        return QRect(
+            0, self.SPACING + row * self.rowHeight(), self.width(), self.PEG_SIZE
+        )
 
-        painter.setPen(QPen(Qt.black, 2))
-        painter.setBrush(QBrush(self.color))
-        painter.drawEllipse(2, 2, self.width() - 4, self.height() - 4)
+    def pegRect(self, row, col):
+        """
+        Returns the area covered by a guess peg.
+
+        Args:
+            row (int): Index of the row.
+            col (int): Index of the peg in the row.
+
+        Returns:
+            QRect: The area, in widget coordinates.
+        """
+        return QRect(
+            self.SPACING + col * (self.PEG_SIZE + self.SPACING),
+            self.SPACING + row * self.rowHeight(),
+            self.PEG_SIZE,
+            self.PEG_SIZE,
+        )
+
+    def feedbackRect(self, row):
+        """
+        Returns the area covered by the feedback pegs of a row.
 
-    def setColor(self, color):
+        Args:
+            row (int): Index of the row.
+
+        Returns:
+            QRect: The area, in widget coordinates.
         """
-        Sets the color attribute and triggers an update.
+        return QRect(
+            self.SPACING + self.seq_l * (self.PEG_SIZE + self.SPACING),
+            self.SPACING + row * self.rowHeight(),
+            self.feedback_columns * self.FEEDBACK_SIZE,
+            self.PEG_SIZE,
+        )
+
+    def setPeg(self, row, col, value):
+        """
+        Sets the color of one guess peg and repaints it.
 
         Args:
-            color (str): The color to be set.
+            row (int): Index of the row.
+            col (int): Index of the peg in the row.
+            value (int): Color number, or 0 to empty the peg.
         """
-        self.color = color
-        self.update()
+        if self.pegs[row][col] != value:
+            self.pegs[row][col] = value
+            self.update(self.pegRect(row, col))
+
+    def setRow(self, row, values):
+        """
+        Sets the colors of every guess peg of a row and repaints it.
+
+        Args:
+            row (int): Index of the row.
+            values (list): Color number of every peg.
+        """
+        self.pegs[row] = list(values)
+        self.update(self.rowRect(row))
+
+    def setFeedback(self, row, exact, color):
+        """
+        Shows the feedback of a row and repaints it.
+
+        Args:
+            row (int): Index of the row.
+            exact (int): Number of pegs with the correct color and position.
+            color (int): Number of pegs with the correct color in the wrong position.
+        """
+        self.feedback[row] = (exact, color)
+        self.update(self.feedbackRect(row))
+
+    def paintEvent(self, event):
+        """
+        Draws the rows intersecting the area to repaint.
+
+        Args:
+            event (QPaintEvent): The paint event that triggered this method.
+        """
+        area = event.rect()
+        height = self.rowHeight()
+        first = max(0, (area.top() - self.SPACING) // height)
+        last = min(self.n - 1, (area.bottom() - self.SPACING) // height)
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(Qt.black, 2))
+        feedback_pen = QPen(Qt.black, 1)
+
+        for row in range(first, last + 1):
+            for col, value in enumerate(self.pegs[row]):
+                rect = self.pegRect(row, col)
+                if rect.intersects(area):
+                    painter.setBrush(self.brushes[value])
+                    painter.drawEllipse(rect.adjusted(2, 2, -2, -2))
+
+            rect = self.feedbackRect(row)
+            if not rect.intersects(area):
+                continue
+            exact, color = self.feedback[row] or (0, 0)
+            painter.save()
+            painter.setPen(feedback_pen)
+            for i in range(self.seq_l):
+                if i < exact:
+                    painter.setBrush(self.exact_brush)
+                elif i < exact + color:
+                    painter.setBrush(self.color_brush)
+                else:
+                    painter.setBrush(self.brushes[0])
+                painter.drawEllipse(
+                    rect.left() + (i % self.feedback_columns) * self.FEEDBACK_SIZE + 1,
+                    rect.top() + (i // self.feedback_columns) * self.FEEDBACK_SIZE + 1,
+                    self.FEEDBACK_SIZE - 2,
+                    self.FEEDBACK_SIZE - 2,
+                )
+            painter.restore()
 
 
 class MastermindBoard(QWidget):
     """
     A QWidget subclass representing the Mastermind game board.
 
+    The pegs are painted by a single `BoardCanvas` in a scroll area, and the board is
+    reset in place with `reset` when a new game starts.
+
     Attributes:
         COLORS (list): List of QColor objects representing the available colors.
         k (int): Number of colors to choose from.
@@ -75,10 +291,10 @@ class MastermindBoard(QWidget):
         current_row (int): Index of the current row being played.
         current_col (int): Index of the current column being played.
         is_auto_mode (bool): Flag indicating if the game is in auto mode.
-        pegs (list): 2D list of PegWidget objects representing the main pegs.
-        feedback_pegs (list): 2D list of PegWidget objects representing the feedback pegs.
-        submit_button (QPushButton): Button to submit the current guess (only in manual mode).
-        auto_play_button (QPushButton): Button to make an automatic move (only in auto mode).
+        canvas (BoardCanvas): Widget painting the pegs and feedback pegs.
+        submit_button (QPushButton): Button to submit the current guess (only shown in manual mode).
+        auto_play_button (QPushButton): Button to make an automatic move (only shown in auto mode).
+        auto_play_all_button (QPushButton): Button to auto-play until the game ends (only shown in auto mode).
 
     """
 
@@ -102,97 +318,89 @@ class MastermindBoard(QWidget):
             is_auto_mode (bool, optional): If True, the game will run in automatic mode. Defaults to False.
         """
         super().__init__()
-        self.k = k
-        self.n = n
-        self.seq_l = seq_l
-        self.current_row = 0
-        self.current_col = 0
-        self.is_auto_mode = is_auto_mode
-        self.initUI()
+        self.initUI(seq_l, n)
+        self.reset(seq_l, k, n, is_auto_mode)
 
-    def initUI(self):
+    def initUI(self, seq_l, n):
         """
         Initializes the user interface for the Mastermind game.
 
-        This method sets up the game board with pegs and feedback pegs, and adds
-        color selection buttons and a submit button in manual mode, or an auto play
-        button in automatic mode.
-
-        Attributes:
-            layout (QGridLayout): The main layout for the game board.
-            pegs (list): A list of lists containing PegWidget objects for the main pegs.
-            feedback_pegs (list): A list of lists containing PegWidget objects for the feedback pegs.
-            color_widget (QWidget): The widget containing color selection buttons (manual mode only).
-            color_layout (QHBoxLayout): The layout for the color selection buttons (manual mode only).
-            submit_button (QPushButton): The button to submit the player's guess (manual mode only).
-            auto_play_button (QPushButton): The button to make an automatic move (automatic mode only).
-
-        Note:
-            This method assumes that `self.n`, `self.seq_l`, `self.COLORS`, `self.k`, and `self.is_auto_mode`
-            are already defined in the class.
-        """
-        layout = QGridLayout()
-        self.pegs = []
-        self.feedback_pegs = []
-
-        # Create game board
-        for row in range(self.n):
-            row_pegs = []
-            row_feedback = []
-
-            # Main pegs
-            for col in range(self.seq_l):
-                peg = PegWidget(QColor(Qt.gray))
-                layout.addWidget(peg, row, col)
-                row_pegs.append(peg)
-
-            # Feedback pegs
-            feedback_widget = QWidget()
-            feedback_layout = QGridLayout()
-            for i in range(self.seq_l):
-                feedback_peg = PegWidget(QColor(Qt.gray), size=15)
-                feedback_layout.addWidget(feedback_peg, 1, i)
-                row_feedback.append(feedback_peg)
-
-            feedback_widget.setLayout(feedback_layout)
-            layout.addWidget(feedback_widget, row, self.seq_l)
-
-            self.pegs.append(row_pegs)
-            self.feedback_pegs.append(row_feedback)
-
-        # Only show color selection and submit button in manual mode
-        if not self.is_auto_mode:
-            # Color selection
-            color_widget = QWidget()
-            color_layout = QHBoxLayout()
-            for i, color in enumerate(self.COLORS[: self.k]):
-                color_button = QPushButton()
-                color_button.setFixedSize(QSize(30, 30))
-                color_button.setStyleSheet(f"background-color: {color.name()}")
-                color_button.clicked.connect(
-                    lambda checked, c=color: self.selectColor(c)
-                )
-                color_layout.addWidget(color_button)
+        This method creates the canvas painting the pegs, and both sets of controls:
+        color selection buttons and a submit button for manual mode, and auto play
+        buttons for automatic mode. `reset` shows the controls of the current mode.
 
-            color_widget.setLayout(color_layout)
-            layout.addWidget(color_widget, self.n, 0, 1, self.k)
+        Args:
+            seq_l (int): The initial length of the sequence.
+            n (int): The initial number of rows.
+        """
+        layout = QVBoxLayout()
 
-            # Submit button
-            self.submit_button = QPushButton("Submit")
-            layout.addWidget(self.submit_button, self.n, self.k)
-        else:
-            # Auto play button
-            self.auto_play_button = QPushButton("Make Auto Move")
-            layout.addWidget(self.auto_play_button, self.n, 0, 1, self.k + 1)
+        self.canvas = BoardCanvas(self.COLORS, seq_l, n)
+        self.scroll_area = QScrollArea()
+        self.scroll_area.setWidget(self.canvas)
+        self.scroll_area.setAlignment(Qt.AlignCenter)
+        layout.addWidget(self.scroll_area)
+
+        # Color selection and submit button, for manual mode
+        self.manual_controls = QWidget()
+        color_layout = QHBoxLayout()
+        self.color_buttons = []
+        for i, color in enumerate(self.COLORS):
+            color_button = QPushButton()
+            color_button.setFixedSize(QSize(30, 30))
+            color_button.setStyleSheet(f"background-color: {color.name()}")
+            color_button.clicked.connect(
+                lambda checked, value=i + 1: self.selectColor(value)
+            )
+            color_layout.addWidget(color_button)
+            self.color_buttons.append(color_button)
+        self.submit_button = QPushButton("Submit")
+        color_layout.addWidget(self.submit_button)
+        self.manual_controls.setLayout(color_layout)
+        layout.addWidget(self.manual_controls)
+
+        # Auto play buttons, for automatic mode
+        self.auto_controls = QWidget()
+        auto_layout = QVBoxLayout()
+        self.auto_play_button = QPushButton("Make Auto Move")
+        auto_layout.addWidget(self.auto_play_button)
+        self.auto_play_all_button = QPushButton("Auto-Play to End")
+        auto_layout.addWidget(self.auto_play_all_button)
+        self.auto_controls.setLayout(auto_layout)
+        layout.addWidget(self.auto_controls)
 
         self.setLayout(layout)
 
+    def reset(self, seq_l, k, n, is_auto_mode=False):
+        """
+        Empties the board for a new game, reusing its widgets.
+
+        Args:
+            seq_l (int): The length of the sequence to guess.
+            k (int): The number of possible values for each position in the sequence.
+            n (int): The number of attempts allowed to guess the sequence.
+            is_auto_mode (bool, optional): If True, the game will run in automatic mode. Defaults to False.
+        """
+        self.k = k
+        self.n = n
+        self.seq_l = seq_l
+        self.current_row = 0
+        self.current_col = 0
+        self.is_auto_mode = is_auto_mode
+
+        self.canvas.reset(seq_l, n)
+        self.scroll_area.ensureVisible(0, 0)
+        for i, color_button in enumerate(self.color_buttons):
+            color_button.setVisible(i < k)
+        self.manual_controls.setVisible(not is_auto_mode)
+        self.auto_controls.setVisible(is_auto_mode)
+
     def selectColor(self, color):
         """
         Selects a color for the current peg in the current row and column, then moves to the next column.
 
         Args:
-            color (str): The color to set for the current peg.
+            color (int): The color number to set for the current peg, starting at 1.
 
         Notes:
             - The method only sets the color if the current row is less than the total number of rows (n)
@@ -201,40 +409,33 @@ class MastermindBoard(QWidget):
               it wraps around to the first column.
         """
         if self.current_row < self.n and self.current_col < self.seq_l:
-            self.pegs[self.current_row][self.current_col].setColor(color)
+            self.canvas.setPeg(self.current_row, self.current_col, color)
             self.current_col = (self.current_col + 1) % self.seq_l
 
     def getCurrentGuess(self):
         """
         Retrieves the current guess from the pegs in the current row.
 
-        Iterates over the pegs in the current row and collects their colors.
-        If any peg has the color gray, it returns None indicating an incomplete guess.
-        Otherwise, it returns a list of integers representing the indices of the colors.
-
         Returns:
             list[int] or None: A list of integers representing the color indices of the current guess,
                                or None if the guess is incomplete.
         """
-        guess = []
-        for peg in self.pegs[self.current_row]:
-            color = peg.color
-            if color == QColor(Qt.gray):
-                return None
-            guess.append(self.COLORS.index(color) + 1)
-        return guess
+        guess = self.canvas.pegs[self.current_row]
+        if 0 in guess:
+            return None
+        return list(guess)
 
     def setGuess(self, guess):
         """
         Sets the colors of the pegs in the current row based on the provided guess.
 
         Args:
-            guess (list of int): A list of integers representing the guessed colors.
-                                 Each integer corresponds to a color index.
+            guess (list of int or int): A list of integers representing the guessed colors,
+                                        or the guess packed into one integer (see `codes.encode`).
+                                        Each color integer corresponds to a color index.
 
         """
-        for i, num in enumerate(guess):
-            self.pegs[self.current_row][i].setColor(self.COLORS[num - 1])
+        self.canvas.setRow(self.current_row, as_sequence(guess, self.seq_l, self.k))
         self.current_col = self.seq_l
 
     def updateFeedback(self, exact, color):
@@ -246,32 +447,53 @@ class MastermindBoard(QWidget):
             exact (int): The number of pegs that are the correct color and in the correct position.
             color (int): The number of pegs that are the correct color but in the wrong position.
         """
-        feedback_row = self.feedback_pegs[self.current_row]
-        idx = 0
-
-        for _ in range(exact):
-            feedback_row[idx].setColor(QColor(Qt.black))
-            idx += 1
+        self.canvas.setFeedback(self.current_row, exact, color)
 
-        for _ in range(color):
-            feedback_row[idx].setColor(QColor(Qt.white))
-            idx += 1
+    def nextRow(self):
+        """
+        Moves to the first peg of the next row and scrolls it into view.
+        """
+        self.current_row += 1
+        self.current_col = 0
+        rect = self.canvas.rowRect(self.current_row)
+        self.scroll_area.ensureVisible(
+            rect.center().x(), rect.center().y(), 0, rect.height()
+        )
 
 
 class MastermindGUI(QMainWindow):
     """
     MastermindGUI is a class that represents the graphical user interface for the Mastermind game.
     It inherits from QMainWindow and provides methods to initialize the game, set up the UI, and handle game logic.
+
+    Automated moves are computed by a `SolverWorker` on a separate thread so the window
+    keeps repainting while the solver is thinking.
+
+    Signals:
+        requestMove (int, object, int, int): Asks the solver worker for the next move.
     """
 
-    def __init__(self):
+    requestMove = pyqtSignal(int, object, int, int)
+
+    def __init__(self, stats=False, trace_path=None, log_path=None, budget=None):
         """
         Initializes the main window of the application.
 
         This constructor method calls the parent class constructor and initializes
         the game and user interface components by calling the initGame and initUI methods.
+
+        Args:
+            stats (bool, optional): Print where the time of each game went when it ends.
+            trace_path (str, optional): Write a Chrome trace of each game to this file.
+            log_path (str, optional): Append every game to this replay log.
+            budget (float, optional): Time the automated player may take per move, in
+                seconds. Defaults to no limit.
         """
         super().__init__()
+        self.stats = stats
+        self.trace_path = trace_path
+        self.budget = budget
+        self.log = ReplayWriter(log_path) if log_path else None
         self.initGame()
         self.initUI()
 
@@ -287,6 +509,13 @@ class MastermindGUI(QMainWindow):
         - `hidden_seq`: The hidden sequence to be guessed, initially set to None.
         - `game_over`: A flag indicating whether the game is over, initially set to False.
         - `auto_player`: An optional automated player, initially set to None.
+        - `generation`: Number of the current game, used to drop moves of previous games.
+        - `thinking`: A flag indicating whether the solver is computing a move.
+        - `auto_play_all`: A flag indicating whether moves are played until the game ends.
+        - `solver_thread`: The thread running the `SolverWorker`.
+        - `instrumentation`: Timing spans and counters of the current game, if enabled.
+        - `turns`: (guess, exact, color, seconds) of every turn, for the replay log.
+        - `replaying`: A flag indicating whether the game is replayed from a log.
         """
         self.k = 4
         self.seq_l = 6
@@ -295,6 +524,22 @@ class MastermindGUI(QMainWindow):
         self.hidden_seq = None
         self.game_over = False
         self.auto_player = None
+        self.generation = 0
+        self.thinking = False
+        self.auto_play_all = False
+        self.instrumentation = None
+        self.turns = []
+        self.game_started = None
+        self.turn_started = None
+        self.replaying = False
+
+        self.solver_thread = QThread(self)
+        self.solver_worker = SolverWorker()
+        self.solver_worker.moveToThread(self.solver_thread)
+        self.requestMove.connect(self.solver_worker.computeMove)
+        self.solver_worker.moveReady.connect(self.onMoveReady)
+        self.solver_worker.moveFailed.connect(self.onMoveFailed)
+        self.solver_thread.start()
 
     def initUI(self):
         """
@@ -304,14 +549,14 @@ class MastermindGUI(QMainWindow):
         It creates and configures various widgets such as spin boxes for selecting the number
         of colors (K) and sequence length (N), radio buttons for selecting the game mode
         (Auto Player or Manual Player), and options for selecting the hidden sequence in auto mode.
-        It also includes a start button to begin the game and a placeholder for the game board.
+        It also includes a start button to begin the game and the game board, hidden until the first game.
 
         Widgets created:
             - QLabel: Labels for colors, sequence length, game mode, and hidden sequence.
             - QSpinBox: Spin boxes for selecting the number of colors (K) and sequence length (N).
             - QRadioButton: Radio buttons for selecting the game mode and hidden sequence options.
             - QPushButton: Button to start the game.
-            - QWidget: Central widget and placeholders for layout and game board.
+            - QWidget: Central widget and layout.
             - QVBoxLayout, QHBoxLayout: Layouts to organize the widgets.
 
         Connections:
@@ -385,9 +630,20 @@ class MastermindGUI(QMainWindow):
 
         layout.addLayout(config_layout)
 
-        # Placeholder for the game board
-        self.board_widget = QWidget()
-        layout.addWidget(self.board_widget)
+        # Busy indicator shown while the solver is thinking
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setFormat("Solver thinking...")
+        self.progress_bar.hide()
+        layout.addWidget(self.progress_bar)
+
+        # Game board, reset in place for every game
+        self.board = MastermindBoard(self.seq_l, self.k, self.n)
+        self.board.submit_button.clicked.connect(self.checkGuess)
+        self.board.auto_play_button.clicked.connect(self.makeAutoMove)
+        self.board.auto_play_all_button.clicked.connect(self.autoPlayToEnd)
+        self.board.hide()
+        layout.addWidget(self.board)
 
         central_widget.setLayout(layout)
         self.setCentralWidget(central_widget)
@@ -456,8 +712,7 @@ class MastermindGUI(QMainWindow):
         1. Retrieves the values for the number of colors (k) and the sequence length (seq_l) from the UI.
         2. Determines the game mode (manual or auto) and generates the hidden sequence accordingly.
         3. Sets up the player mode (manual or auto).
-        4. Creates a new game board and connects the appropriate signals for user interaction.
-        5. Updates the UI to display the new game board.
+        4. Resets the game board in place for the new game and shows it.
 
         If the user cancels the manual sequence input, the game initialization is aborted.
 
@@ -466,7 +721,6 @@ class MastermindGUI(QMainWindow):
         """
         self.k = self.k_spin.value()
         self.seq_l = self.n_spin.value()
-        self.game_over = False
 
         # Generate hidden sequence based on game mode
         if self.manual_radio.isChecked():
@@ -485,43 +739,136 @@ class MastermindGUI(QMainWindow):
 
                 self.hidden_seq = [random.randint(1, self.k) for _ in range(self.seq_l)]
 
-        # Setup player
-        is_auto_mode = self.auto_radio.isChecked()
-        if is_auto_mode:
-            self.auto_player = AutoPlayer()
+        self.setupGame(self.auto_radio.isChecked())
+
+    def setupGame(self, is_auto_mode, replaying=False):
+        """
+        Resets the board for a new game with the current k, seq_l and hidden_seq.
+
+        Args:
+            is_auto_mode (bool): Whether moves come from the automated player.
+            replaying (bool, optional): Whether the game is replayed from a log.
+        """
+        # An unfinished game is logged as abandoned before it is replaced, unless it
+        # was itself replayed
+        if not self.game_over and self.turns:
+            self.logGame("playing")
+        self.replaying = replaying
+        self.game_over = False
+        self.turns = []
+        self.game_started = time.time()
+        self.turn_started = time.perf_counter()
+
+        # Drop any move still being computed for the previous game
+        self.generation += 1
+        self.setThinking(False)
+        self.auto_play_all = False
 
-        # Create new board
-        self.board = MastermindBoard(self.seq_l, self.k, self.n, is_auto_mode)
+        if self.stats or self.trace_path:
+            self.instrumentation = instrumentation.Instrumentation()
+            instrumentation.activate(self.instrumentation)
+
+        # Setup player
         if is_auto_mode:
-            self.board.auto_play_button.clicked.connect(self.makeAutoMove)
+            self.auto_player = make_auto_player(self.seq_l, self.k, self.budget)
         else:
-            self.board.submit_button.clicked.connect(self.checkGuess)
+            self.auto_player = None
+
+        self.board.reset(self.seq_l, self.k, self.n, is_auto_mode)
+        self.board.show()
 
-        # Update layout
-        old_board = self.board_widget
-        self.board_widget = self.board
-        self.centralWidget().layout().replaceWidget(old_board, self.board)
-        old_board.deleteLater()
+    def setThinking(self, thinking):
+        """
+        Shows or hides the busy indicator for the solver.
+
+        Args:
+            thinking (bool): True while the solver is computing a move.
+        """
+        self.thinking = thinking
+        self.progress_bar.setVisible(thinking)
 
     def makeAutoMove(self):
         """
         Makes an automatic move in the game.
 
         This method is called to make a move on behalf of the automated player.
-        It first checks if the game is over. If the game is not over, it gets a
-        guess from the automated player, sets the guess on the board, and then
-        checks the guess.
+        It first checks if the game is over or a move is already being computed.
+        Otherwise it asks the solver worker for a guess; the guess is placed on the
+        board and checked by `onMoveReady` once it arrives.
 
         Returns:
             None
         """
-        if self.game_over:
+        if self.game_over or self.thinking:
             return
 
-        guess = self.auto_player.get_query(self.seq_l, self.k)
+        self.setThinking(True)
+        self.requestMove.emit(self.generation, self.auto_player, self.seq_l, self.k)
+
+    def autoPlayToEnd(self):
+        """
+        Keeps making automatic moves until the game is over.
+
+        Returns:
+            None
+        """
+        self.auto_play_all = True
+        self.makeAutoMove()
+
+    def onMoveReady(self, generation, guess):
+        """
+        Places a move computed by the solver worker on the board and checks it.
+
+        Moves that belong to a previous game are ignored. In auto-play-to-end mode the
+        next move is requested from the event loop, so the board repaints in between.
+
+        Args:
+            generation (int): Generation number of the game the move was computed for.
+            guess (list): The computed guess.
+        """
+        if generation != self.generation:
+            return
+
+        self.setThinking(False)
         self.board.setGuess(guess)
         self.checkGuess()
 
+        if self.auto_play_all and not self.game_over:
+            QTimer.singleShot(0, self.makeAutoMove)
+
+    def onMoveFailed(self, generation, message):
+        """
+        Reports an error raised by the automated player.
+
+        Args:
+            generation (int): Generation number of the game the move was computed for.
+            message (str): The error message.
+        """
+        if generation != self.generation:
+            return
+
+        self.setThinking(False)
+        self.auto_play_all = False
+        QMessageBox.warning(self, "Auto Move Failed", message)
+
+    def closeEvent(self, event):
+        """
+        Stops the solver thread before the window closes.
+
+        A move still being computed is allowed to finish, since it cannot be interrupted.
+
+        Args:
+            event (QCloseEvent): The close event.
+        """
+        self.generation += 1
+        self.solver_thread.quit()
+        self.solver_thread.wait()
+        if self.log is not None:
+            if not self.game_over and self.turns:
+                self.logGame("playing")
+            self.log.close()
+        super().closeEvent(event)
+
     def checkGuess(self):
         """
         Checks the current guess made by the player and provides feedback.
@@ -547,20 +894,105 @@ class MastermindGUI(QMainWindow):
             QMessageBox.warning(self, "Invalid Move", "Please fill all positions!")
             return
 
-        exact, color = self.judge.check(self.k, self.hidden_seq, guess)
-        self.board.updateFeedback(exact, color)
+        with instrumentation.span("judge.check"):
+            exact, color = self.judge.check(self.k, self.hidden_seq, guess, self.seq_l)
+        now = time.perf_counter()
+        self.turns.append((guess, exact, color, now - self.turn_started))
+        self.turn_started = now
+        with instrumentation.span("feedback.render"):
+            self.board.updateFeedback(exact, color)
+        if self.auto_player is not None:
+            with instrumentation.span("player.receive_feedback"):
+                self.auto_player.receive_feedback(guess, exact, color)
 
         if exact == self.seq_l:
-            QMessageBox.information(self, "Congratulations!", "You won!")
+            self.reportInstrumentation()
+            self.logGame("won")
             self.game_over = True
+            QMessageBox.information(self, "Congratulations!", "You won!")
         elif self.board.current_row == self.n - 1:
+            self.reportInstrumentation()
+            self.logGame("lost")
+            self.game_over = True
             QMessageBox.information(
-                self, "Game Over", f"The sequence was {self.hidden_seq}"
+                self,
+                "Game Over",
+                f"The sequence was {as_sequence(self.hidden_seq, self.seq_l, self.k)}",
             )
-            self.game_over = True
         else:
-            self.board.current_row += 1
-            self.board.current_col = 0
+            self.board.nextRow()
+
+    def logGame(self, status):
+        """
+        Appends the current game to the replay log, if one is open.
+
+        Games replayed from a log are not logged again.
+
+        Args:
+            status (str): "playing" (abandoned), "won" or "lost".
+        """
+        if self.log is None or self.replaying:
+            return
+        self.log.write(
+            self.seq_l,
+            self.k,
+            self.n,
+            self.hidden_seq,
+            self.turns,
+            status,
+            self.game_started,
+        )
+
+    def replayGame(self, record, interval=500):
+        """
+        Plays a recorded game on the board, one move every `interval` milliseconds.
+
+        Args:
+            record (GameRecord): The game, as read from a `replay.ReplayLog`.
+            interval (int, optional): Delay between moves. Defaults to 500.
+
+        Raises:
+            ValueError: If the game does not fit on the board.
+        """
+        if (
+            record.k > len(MastermindBoard.COLORS)
+            or record.n > self.n_spin.maximum()
+            or len(record.queries) > self.n
+        ):
+            raise ValueError("The recorded game does not fit on the board")
+
+        self.k_spin.setValue(record.k)
+        self.n_spin.setValue(record.n)
+        self.manual_radio.setChecked(True)
+        self.k = record.k
+        self.seq_l = record.n
+        self.hidden_seq = record.hidden.tolist()
+        self.setupGame(False, replaying=True)
+
+        generation = self.generation
+        moves = record.queries.tolist()
+
+        def playNext():
+            if generation != self.generation or self.game_over or not moves:
+                return
+            self.board.setGuess(moves.pop(0))
+            self.checkGuess()
+            QTimer.singleShot(interval, playNext)
+
+        QTimer.singleShot(interval, playNext)
+
+    def reportInstrumentation(self):
+        """
+        Prints and exports the instrumentation of the game that just ended, if enabled.
+        """
+        if self.instrumentation is None:
+            return
+        instrumentation.activate(None)
+        if self.stats:
+            print(self.instrumentation)
+        if self.trace_path:
+            self.instrumentation.dump_trace(self.trace_path)
+        self.instrumentation = None
 
 
 def main():
@@ -573,8 +1005,28 @@ def main():
     Returns:
         None
     """
-    app = QApplication(sys.argv)
-    window = MastermindGUI()
+    parser = argparse.ArgumentParser(description="Play Mastermind in a window.")
+    parser.add_argument(
+        "--stats", action="store_true", help="print where the time of each game went"
+    )
+    parser.add_argument(
+        "--trace", help="write a Chrome trace of each game to this file"
+    )
+    parser.add_argument("--log", help="append every game to this replay log")
+    parser.add_argument(
+        "--budget", type=float, help="seconds the automated player may take per move"
+    )
+    parser.add_argument("--replay", help="replay a game from this log")
+    parser.add_argument(
+        "--game", type=int, default=0, help="position of the game to replay"
+    )
+    # Anything else is left to Qt
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = MastermindGUI(args.stats, args.trace, args.log, args.budget)
+    if args.replay:
+        window.replayGame(ReplayLog(args.replay)[args.game])
     window.show()
     sys.exit(app.exec_())
 
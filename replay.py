@@ -0,0 +1,518 @@
+import argparse
+import os
+import struct
+import time
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from codes import as_sequence
+from feedback import FORMAT_VERSION as FEEDBACK_VERSION
+from game import Game
+from player import make_player
+
+# Bump whenever the record layout changes
+LOG_VERSION = 1
+
+MAGIC = b"MMLOG"
+
+# magic, log version, feedback version (the Judge rules the feedback was computed with)
+FILE_HEADER = struct.Struct("<5sHH")
+
+# record size, n, k, max turns, turns, status, start time (Unix seconds)
+RECORD_HEADER = struct.Struct("<IBBBBBd")
+
+# exact matches, color matches, seconds spent on the turn
+TURN = struct.Struct("<BBf")
+
+# `RECORD_HEADER` as a NumPy dtype, for reading many headers at once
+RECORD_HEADER_DTYPE = np.dtype(
+    [
+        ("size", "<u4"),
+        ("n", "u1"),
+        ("k", "u1"),
+        ("max_turns", "u1"),
+        ("turns", "u1"),
+        ("status", "u1"),
+        ("started", "<f8"),
+    ]
+)
+
+STATUSES = ("playing", "won", "lost")
+
+# One game read back from a log; queries is a (turns, n) uint8 array, feedback a
+# (turns, 2) array of (exact, color) pairs and seconds a float32 array
+GameRecord = namedtuple(
+    "GameRecord",
+    [
+        "n",
+        "k",
+        "max_turns",
+        "status",
+        "started",
+        "hidden",
+        "queries",
+        "feedback",
+        "seconds",
+    ],
+)
+
+
+def _turn_dtype(n):
+    # A turn is stored as the query colors followed by a `TURN` struct
+    return np.dtype(
+        [
+            ("query", np.uint8, (n,)),
+            ("exact", np.uint8),
+            ("color", np.uint8),
+            ("seconds", "<f4"),
+        ]
+    )
+
+
+class ReplayWriter:
+    """
+    Appends finished games to a binary replay log.
+
+    The log starts with a small file header followed by one self-delimiting record
+    per game: a `RECORD_HEADER`, the hidden sequence as n bytes, then per turn the
+    query as n bytes and a `TURN` struct. Every record is written in one piece to a
+    file opened for appending, so an interrupted writer leaves at worst a truncated
+    last record, which readers skip and the next writer cuts off before appending.
+
+    Attributes:
+        path (str): The log file.
+    """
+
+    def __init__(self, path):
+        """
+        Opens (or creates) a log for appending.
+
+        Args:
+            path (str): The log file.
+
+        Raises:
+            ValueError: If the file exists but is not a replay log of this version, or
+                its games were judged with other feedback rules.
+        """
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "ab")
+        if self.file.tell() == 0:
+            self.file.write(FILE_HEADER.pack(MAGIC, LOG_VERSION, FEEDBACK_VERSION))
+            self.file.flush()
+            return
+        try:
+            with open(path, "r+b") as f:
+                feedback_version = _check_header(f.read(FILE_HEADER.size))
+                if feedback_version == FEEDBACK_VERSION:
+                    # Appending after a truncated record would hide every later one
+                    f.truncate(_complete_length(f))
+            if feedback_version != FEEDBACK_VERSION:
+                raise ValueError(
+                    "The log was judged with other feedback rules; start a new one"
+                )
+        except BaseException:
+            self.file.close()
+            raise
+
+    def write(self, n, k, max_turns, hidden, turns, status, started=None):
+        """
+        Appends one game.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            max_turns (int): Maximum number of turns.
+            hidden (list): The hidden sequence.
+            turns (list): (query, correct_position_and_color, correct_color, seconds)
+                for every turn played.
+            status (str): "playing" (abandoned), "won" or "lost".
+            started (float, optional): Start time in Unix seconds. Defaults to now.
+
+        Raises:
+            ValueError: If a value does not fit the record layout.
+        """
+        if n > 255 or k > 255 or max_turns > 255 or len(turns) > 255:
+            raise ValueError("Replay logs hold games with n, k and turns below 256")
+
+        body = [bytes(int(c) for c in hidden)]
+        for query, exact, color, seconds in turns:
+            body.append(bytes(int(c) for c in query))
+            body.append(TURN.pack(exact, color, seconds))
+        body = b"".join(body)
+
+        header = RECORD_HEADER.pack(
+            RECORD_HEADER.size + len(body),
+            n,
+            k,
+            max_turns,
+            len(turns),
+            STATUSES.index(status),
+            time.time() if started is None else started,
+        )
+        self.file.write(header + body)
+        self.file.flush()
+
+    def write_game(self, game):
+        """
+        Appends a `game.Game` with its turns so far.
+
+        Args:
+            game (Game): The game to record.
+        """
+        self.write(
+            game.n,
+            game.k,
+            game.max_turns,
+            game.hidden_seq,
+            [
+                (
+                    as_sequence(result.query, game.n, game.k),
+                    result.correct_position_and_color,
+                    result.correct_color,
+                    result.seconds,
+                )
+                for result in game.history
+            ],
+            game.status,
+            game.started,
+        )
+
+    def close(self):
+        """
+        Closes the log file.
+        """
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _check_header(data):
+    """
+    Validates the file header of a log.
+
+    Args:
+        data (bytes): The first bytes of the file.
+
+    Returns:
+        int: The feedback version the games were judged with.
+
+    Raises:
+        ValueError: If the data is not a replay log of this version.
+    """
+    if len(data) < FILE_HEADER.size:
+        raise ValueError("Not a replay log")
+    magic, version, feedback_version = FILE_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a replay log")
+    if version != LOG_VERSION:
+        raise ValueError(f"Unsupported replay log version: {version}")
+    return feedback_version
+
+
+def _complete_length(f):
+    """
+    Returns the length of a log up to the end of its last complete record.
+
+    Args:
+        f (file): The log, opened for binary reading.
+
+    Returns:
+        int: The length in bytes, including the file header.
+    """
+    end = f.seek(0, os.SEEK_END)
+    offset = FILE_HEADER.size
+    while offset + RECORD_HEADER.size <= end:
+        f.seek(offset)
+        size = struct.unpack("<I", f.read(4))[0]
+        if size < RECORD_HEADER.size or offset + size > end:
+            break
+        offset += size
+    return offset
+
+
+class ReplayLog:
+    """
+    Reads a replay log through a memory map.
+
+    Games are decoded lazily while iterating, so logs of millions of games can be
+    scanned without loading them; queries, feedback and timings are NumPy views
+    into the map.
+
+    Attributes:
+        path (str): The log file.
+        feedback_version (int): `feedback.FORMAT_VERSION` of the writer.
+    """
+
+    def __init__(self, path):
+        """
+        Opens a log for reading.
+
+        Args:
+            path (str): The log file.
+
+        Raises:
+            ValueError: If the file is not a replay log of this version.
+        """
+        self.path = path
+        if os.path.getsize(path) <= FILE_HEADER.size:
+            with open(path, "rb") as f:
+                self.data = np.frombuffer(f.read(), np.uint8)
+        else:
+            self.data = np.memmap(path, np.uint8, mode="r")
+        self.feedback_version = _check_header(self.data)
+        self._offsets = None
+
+    def __iter__(self):
+        """
+        Yields every complete game, in the order they were written.
+
+        Yields:
+            GameRecord: The next game.
+        """
+        offset = FILE_HEADER.size
+        end = len(self.data)
+        while offset + RECORD_HEADER.size <= end:
+            record = self._read(offset)
+            if record is None:
+                break
+            yield record[0]
+            offset = record[1]
+
+    def _read(self, offset):
+        """
+        Decodes the record at an offset.
+
+        Returns:
+            tuple or None: (GameRecord, offset of the next record), or None if the
+            record is truncated.
+        """
+        size, n, k, max_turns, turns, status, started = RECORD_HEADER.unpack_from(
+            self.data, offset
+        )
+        if offset + size > len(self.data):
+            return None
+
+        start = offset + RECORD_HEADER.size + n
+        hidden = self.data[start - n : start]
+        moves = self.data[start : offset + size].view(_turn_dtype(n))
+        record = GameRecord(
+            n,
+            k,
+            max_turns,
+            STATUSES[status],
+            started,
+            hidden,
+            moves["query"],
+            np.stack([moves["exact"], moves["color"]], axis=-1),
+            moves["seconds"],
+        )
+        return record, offset + size
+
+    def offsets(self):
+        """
+        Returns the offset of every complete record, computed once.
+
+        Returns:
+            list: Byte offsets.
+        """
+        if self._offsets is None:
+            offsets = []
+            offset = FILE_HEADER.size
+            while offset + RECORD_HEADER.size <= len(self.data):
+                size = struct.unpack_from("<I", self.data, offset)[0]
+                if offset + size > len(self.data):
+                    break
+                offsets.append(offset)
+                offset += size
+            self._offsets = offsets
+        return self._offsets
+
+    def __len__(self):
+        return len(self.offsets())
+
+    def columns(self):
+        """
+        Loads the whole log into flat NumPy arrays, without a Python loop per turn.
+
+        Returns:
+            dict: Per game: "n", "k", "max_turns", "turns", "status" (index into
+                `STATUSES`) and "started". Per turn, in game order: "game" (index of
+                its game), "exact", "color", "seconds" and, when every game has the
+                same n, "query" as a (turns, n) array.
+        """
+        offsets = np.array(self.offsets(), dtype=np.int64)
+        positions = offsets[:, np.newaxis] + np.arange(RECORD_HEADER.size)
+        headers = self.data[positions].view(RECORD_HEADER_DTYPE)[:, 0]
+
+        counts = headers["turns"].astype(np.int64)
+        n = headers["n"].astype(np.int64)
+        game = np.repeat(np.arange(len(offsets)), counts)
+        # Position of every turn within its game, then its byte offset in the file
+        first = np.cumsum(counts) - counts
+        index = np.arange(counts.sum()) - np.repeat(first, counts)
+        turn_size = n + TURN.size
+        starts = (offsets + RECORD_HEADER.size + n)[game] + index * turn_size[game]
+
+        def field(offset, dtype):
+            width = np.dtype(dtype).itemsize
+            raw = self.data[(starts + offset)[:, np.newaxis] + np.arange(width)]
+            return raw.view(dtype)[:, 0]
+
+        result = {
+            "n": headers["n"],
+            "k": headers["k"],
+            "max_turns": headers["max_turns"],
+            "turns": headers["turns"],
+            "status": headers["status"],
+            "started": headers["started"],
+            "game": game,
+            "exact": field(n[game], "u1"),
+            "color": field(n[game] + 1, "u1"),
+            "seconds": field(n[game] + 2, "<f4"),
+        }
+        if len(offsets) and (n == n[0]).all():
+            result["query"] = self.data[starts[:, np.newaxis] + np.arange(n[0])]
+        return result
+
+    def __getitem__(self, index):
+        """
+        Returns one game by position.
+
+        Args:
+            index (int): Position of the game in the log.
+
+        Returns:
+            GameRecord: The game.
+        """
+        return self._read(self.offsets()[index])[0]
+
+    def close(self):
+        """
+        Drops the memory map; it is unmapped once no record refers to it anymore.
+        """
+        self.data = np.empty(0, np.uint8)
+        self._offsets = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def replay(record, player=None):
+    """
+    Re-drives a `game.Game` from a recorded game.
+
+    Without a player the recorded queries are played again, which checks that the
+    current `Judge` gives the recorded feedback. With a player, the player is asked
+    for its moves against the recorded hidden sequence, e.g. to reproduce a slow or
+    failing solver run.
+
+    Args:
+        record (GameRecord): The recorded game.
+        player (optional): Object with `get_query(n, k)` and `receive_feedback(...)`.
+
+    Returns:
+        tuple: (game, mismatches) where game is the replayed `Game` and mismatches
+            lists the turns whose feedback differs from the record.
+    """
+    hidden = record.hidden.tolist()
+    game = Game(record.n, record.k, hidden, player, record.max_turns)
+    mismatches = []
+
+    if player is None:
+        for turn, query in enumerate(record.queries.tolist()):
+            result = game.play_turn(query)
+            expected = tuple(record.feedback[turn].tolist())
+            if (result.correct_position_and_color, result.correct_color) != expected:
+                mismatches.append(turn + 1)
+    else:
+        while not game.over:
+            game.play_turn()
+    return game, mismatches
+
+
+def summarize(log):
+    """
+    Aggregates every game of a log.
+
+    Args:
+        log (ReplayLog): The log.
+
+    Returns:
+        dict: Number of games, status counts, turn histogram of won games and the
+            slowest turn.
+    """
+    statuses = Counter()
+    histogram = Counter()
+    slowest = (0.0, None, None)
+    for index, record in enumerate(log):
+        statuses[record.status] += 1
+        if record.status == "won":
+            histogram[len(record.queries)] += 1
+        if len(record.seconds):
+            turn = int(record.seconds.argmax())
+            if record.seconds[turn] > slowest[0]:
+                slowest = (float(record.seconds[turn]), index, turn + 1)
+    return {
+        "games": sum(statuses.values()),
+        "statuses": dict(statuses),
+        "histogram": {str(t): histogram[t] for t in sorted(histogram)},
+        "slowest_turn": {
+            "seconds": slowest[0],
+            "game": slowest[1],
+            "turn": slowest[2],
+        },
+    }
+
+
+def main():
+    """
+    Command-line entry point to inspect and replay logs.
+    """
+    parser = argparse.ArgumentParser(description="Inspect and replay game logs.")
+    parser.add_argument("log", help="replay log file")
+    parser.add_argument("--game", type=int, help="show or replay only this game")
+    parser.add_argument(
+        "--replay",
+        action="store_true",
+        help="replay the recorded queries and check the feedback",
+    )
+    parser.add_argument(
+        "--player", help="replay with this player (see player.make_player) instead"
+    )
+    args = parser.parse_args()
+
+    with ReplayLog(args.log) as log:
+        if not args.replay and args.player is None:
+            if args.game is None:
+                print(summarize(log))
+            else:
+                print(log[args.game])
+            return
+
+        if args.replay and log.feedback_version != FEEDBACK_VERSION:
+            print("The log was judged with other feedback rules; expect mismatches")
+
+        indices = range(len(log)) if args.game is None else [args.game]
+        for index in indices:
+            record = log[index]
+            player = make_player(args.player) if args.player else None
+            start = time.perf_counter()
+            game, mismatches = replay(record, player)
+            elapsed = time.perf_counter() - start
+            line = f"game {index}: {game.status} in {game.turns} turns, {elapsed:.3f} s"
+            if mismatches:
+                line += f", feedback differs at turns {mismatches}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
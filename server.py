@@ -0,0 +1,503 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from codes import encode
+from game import Game
+from judge import Judge
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Largest code spaces a client may ask for
+MAX_N = 12
+MAX_K = 16
+
+
+def _is_int(value):
+    # JSON true and false decode to bools, which are ints to Python
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+async def _read_line(reader):
+    """
+    Reads one request line.
+
+    Args:
+        reader (asyncio.StreamReader): The connection's input.
+
+    Returns:
+        bytes: The line, or b"" once the client has closed the connection.
+
+    Raises:
+        ValueError: If the line is longer than the reader's limit; the whole line is
+            skipped, so the next call returns the next request.
+    """
+    try:
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as error:
+        return error.partial
+    except asyncio.LimitOverrunError as error:
+        skip = error.consumed
+
+    while True:
+        try:
+            await reader.readexactly(skip)
+            await reader.readuntil(b"\n")
+            break
+        except asyncio.IncompleteReadError:
+            break
+        except asyncio.LimitOverrunError as error:
+            skip = error.consumed
+    raise ValueError("Request line too long")
+
+
+class BatchScorer:
+    """
+    Scores guesses from many sessions together.
+
+    Guesses submitted while a batch is pending are queued; the batch is scored once
+    the event loop has handled every request that was already waiting (or after
+    `delay` seconds), with one `Judge.check_pairs` call per (n, k).
+
+    Attributes:
+        delay (float): Extra time to wait for more guesses before scoring, in seconds.
+        batches (int): Number of batches scored.
+        scored (int): Number of guesses scored.
+    """
+
+    def __init__(self, delay=0.0):
+        """
+        Initializes an empty scorer.
+
+        Args:
+            delay (float, optional): Extra time to wait before scoring. Defaults to 0.
+        """
+        self.delay = delay
+        self.pending = []
+        self.flush_task = None
+        self.batches = 0
+        self.scored = 0
+
+    def score(self, n, k, hidden, query):
+        """
+        Queues one guess for scoring.
+
+        Args:
+            n (int): Length of the sequences.
+            k (int): Number of colors.
+            hidden (list): The hidden sequence.
+            query (list): The guess, already validated.
+
+        Returns:
+            asyncio.Future: Resolves to (correct_position_and_color, correct_color).
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((n, k, hidden, query, future))
+        if self.flush_task is None:
+            self.flush_task = asyncio.ensure_future(self._flush())
+        return future
+
+    async def _flush(self):
+        """
+        Scores every queued guess.
+        """
+        # Let the other ready connections submit their guesses first
+        await asyncio.sleep(self.delay)
+        pending, self.pending = self.pending, []
+        self.flush_task = None
+
+        groups = {}
+        for entry in pending:
+            groups.setdefault((entry[0], entry[1]), []).append(entry)
+
+        for (n, k), entries in groups.items():
+            hidden = np.array([entry[2] for entry in entries])
+            queries = np.array([entry[3] for entry in entries])
+            exact, color = Judge.check_pairs(k, hidden, queries)
+            for entry, e, c in zip(entries, exact.tolist(), color.tolist()):
+                if not entry[4].cancelled():
+                    entry[4].set_result((e, c))
+
+        self.batches += 1
+        self.scored += len(pending)
+
+
+class GameServer:
+    """
+    Hosts many concurrent `Game` sessions over a line-based JSON protocol.
+
+    Each request and response is one JSON object per line. Hidden sequences never
+    leave the server until the game is lost. Requests:
+
+    - {"op": "new", "n": 4, "k": 6} starts a session; "max_turns" is optional.
+    - {"op": "guess", "session": id, "query": [...]} plays one turn.
+    - {"op": "close", "session": id} ends a session.
+    - {"op": "stats"} reports the number of sessions and scored batches.
+
+    Errors are answered with {"error": message}.
+
+    Sessions belong to the connection that started them: other connections cannot
+    play or close them, and they are closed when it disconnects. Sessions without a
+    request for `session_timeout` seconds are closed too; they are swept whenever a
+    request arrives.
+
+    Attributes:
+        max_sessions (int): Maximum number of open sessions.
+        max_turns (int): Largest turn limit a session may ask for, and the default.
+        session_timeout (float or None): Idle time after which a session is closed,
+            in seconds; None keeps idle sessions open.
+        sessions (dict): Open `Game` sessions by id.
+        scorer (BatchScorer): Scores the guesses of all sessions.
+        expired (int): Number of sessions closed for being idle.
+    """
+
+    def __init__(
+        self,
+        max_sessions=100000,
+        max_turns=10,
+        batch_delay=0.0,
+        seed=None,
+        session_timeout=300.0,
+    ):
+        """
+        Initializes the server.
+
+        Args:
+            max_sessions (int, optional): Maximum number of open sessions.
+            max_turns (int, optional): Turn limit of the sessions. Defaults to 10.
+            batch_delay (float, optional): Extra time to collect guesses into a batch.
+            seed (int, optional): Seed for the hidden sequences.
+            session_timeout (float, optional): Idle time after which a session is
+                closed, in seconds. Defaults to 300; None keeps idle sessions open.
+        """
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.session_timeout = session_timeout
+        self.sessions = {}
+        # Last request time of every session, least recently active first
+        self.activity = OrderedDict()
+        # Set of session ids of the connection that started each session
+        self.owners = {}
+        self.expired = 0
+        self.ids = itertools.count(1)
+        self.rng = random.Random(seed)
+        self.scorer = BatchScorer(batch_delay)
+
+    def new_session(self, n, k, max_turns=None, owner=None):
+        """
+        Starts a session with a random hidden sequence.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            max_turns (int, optional): Turn limit, at most the server's.
+            owner (set, optional): Session ids of the connection starting the session;
+                the new id is added to it.
+
+        Returns:
+            dict: The response.
+
+        Raises:
+            ValueError: If the parameters are out of range or the server is full.
+        """
+        if not (_is_int(n) and 1 <= n <= MAX_N):
+            raise ValueError(f"n must be between 1 and {MAX_N}")
+        if not (_is_int(k) and 1 <= k <= MAX_K):
+            raise ValueError(f"k must be between 1 and {MAX_K}")
+        if max_turns is None:
+            max_turns = self.max_turns
+        if not (_is_int(max_turns) and 1 <= max_turns <= self.max_turns):
+            raise ValueError(f"max_turns must be between 1 and {self.max_turns}")
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError("Too many open sessions")
+
+        session = next(self.ids)
+        hidden = [self.rng.randint(1, k) for _ in range(n)]
+        self.sessions[session] = Game(n, k, hidden, max_turns=max_turns)
+        self._touch(session)
+        if owner is not None:
+            owner.add(session)
+            self.owners[session] = owner
+        return {"session": session, "n": n, "k": k, "max_turns": max_turns}
+
+    def _game(self, session, owner=None):
+        """
+        Returns the game of an open session and marks the session as active.
+
+        Args:
+            session (int): The session id.
+            owner (set, optional): Session ids of the connection asking; other
+                sessions are treated as unknown.
+
+        Raises:
+            ValueError: If the session id is not an integer or does not exist.
+        """
+        if not _is_int(session):
+            raise ValueError("session must be an integer")
+        game = self.sessions.get(session)
+        if game is None or (owner is not None and session not in owner):
+            raise ValueError(f"Unknown session: {session}")
+        self._touch(session)
+        return game
+
+    def _touch(self, session):
+        """
+        Records a request for a session.
+        """
+        self.activity[session] = time.monotonic()
+        self.activity.move_to_end(session)
+
+    def _drop(self, session):
+        """
+        Forgets a session, if it is still open.
+        """
+        self.sessions.pop(session, None)
+        self.activity.pop(session, None)
+        owner = self.owners.pop(session, None)
+        if owner is not None:
+            owner.discard(session)
+
+    def expire_idle(self, now=None):
+        """
+        Closes the sessions idle for longer than `session_timeout`.
+
+        Args:
+            now (float, optional): Current `time.monotonic()` value.
+
+        Returns:
+            int: Number of sessions closed.
+        """
+        if self.session_timeout is None:
+            return 0
+        if now is None:
+            now = time.monotonic()
+
+        expired = 0
+        # Least recently active first: stop at the first session still in use
+        while self.activity:
+            session, last = next(iter(self.activity.items()))
+            if now - last < self.session_timeout:
+                break
+            self._drop(session)
+            expired += 1
+        self.expired += expired
+        return expired
+
+    async def guess(self, session, query, owner=None):
+        """
+        Plays one turn of a session.
+
+        Finished sessions are closed once their result has been sent.
+
+        Args:
+            session (int): The session id.
+            query (list): The guess.
+            owner (set, optional): Session ids of the connection playing.
+
+        Returns:
+            dict: The turn result.
+
+        Raises:
+            ValueError: If the session does not exist or the query is invalid or used.
+        """
+        game = self._game(session, owner)
+        if not isinstance(query, list) or len(query) != game.n:
+            raise ValueError(f"query must be a list of {game.n} colors")
+        if any(not _is_int(c) or c < 1 or c > game.k for c in query):
+            raise ValueError(f"All numbers must be between 1 and {game.k}")
+        if encode(query, game.k) in game.used_queries:
+            raise ValueError("This query has already been used")
+
+        exact, color = await self.scorer.score(game.n, game.k, game.hidden_seq, query)
+        result = game.record(query, exact, color)
+
+        response = {
+            "turn": result.turn,
+            "correct_position_and_color": result.correct_position_and_color,
+            "correct_color": result.correct_color,
+            "status": result.status,
+        }
+        if game.over:
+            self._drop(session)
+            if result.status == "lost":
+                response["hidden"] = game.hidden_seq
+        return response
+
+    def close(self, session, owner=None):
+        """
+        Ends a session.
+
+        Args:
+            session (int): The session id.
+            owner (set, optional): Session ids of the connection closing it.
+
+        Returns:
+            dict: The response.
+
+        Raises:
+            ValueError: If the session does not exist.
+        """
+        self._game(session, owner)
+        self._drop(session)
+        return {"closed": session}
+
+    def stats(self):
+        """
+        Reports the server load.
+
+        Returns:
+            dict: Open and expired sessions, scored batches and scored guesses.
+        """
+        return {
+            "sessions": len(self.sessions),
+            "expired": self.expired,
+            "batches": self.scorer.batches,
+            "scored": self.scorer.scored,
+        }
+
+    async def handle_request(self, request, owner=None):
+        """
+        Answers one decoded request.
+
+        Args:
+            request (dict): The request.
+            owner (set, optional): Session ids of the connection sending the request.
+
+        Returns:
+            dict: The response.
+        """
+        self.expire_idle()
+        try:
+            op = request.get("op")
+            if op == "new":
+                return self.new_session(
+                    request.get("n"), request.get("k"), request.get("max_turns"), owner
+                )
+            if op == "guess":
+                return await self.guess(
+                    request.get("session"), request.get("query"), owner
+                )
+            if op == "close":
+                return self.close(request.get("session"), owner)
+            if op == "stats":
+                return self.stats()
+            raise ValueError(f"Unknown op: {op}")
+        except (ValueError, RuntimeError) as error:
+            return {"error": str(error)}
+
+    async def _answer(self, line, owner):
+        """
+        Answers one request line.
+
+        Args:
+            line (bytes): The request, as received.
+            owner (set): Session ids of the connection sending the request.
+
+        Returns:
+            dict: The response.
+        """
+        try:
+            request = json.loads(line)
+        except (ValueError, RecursionError):
+            return {"error": "Invalid JSON"}
+        if not isinstance(request, dict):
+            return {"error": "Requests must be JSON objects"}
+        return await self.handle_request(request, owner)
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves the requests of one client connection, in order, and closes the
+        sessions it leaves open when it disconnects.
+
+        Args:
+            reader (asyncio.StreamReader): The connection's input.
+            writer (asyncio.StreamWriter): The connection's output.
+        """
+        owned = set()
+        try:
+            while True:
+                try:
+                    line = await _read_line(reader)
+                except ValueError as error:
+                    response = {"error": str(error)}
+                else:
+                    if not line:
+                        break
+                    response = await self._answer(line, owned)
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session in list(owned):
+                self._drop(session)
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Starts listening for clients.
+
+        Args:
+            host (str, optional): Address to bind. Defaults to localhost.
+            port (int, optional): Port to bind; 0 picks a free one.
+
+        Returns:
+            asyncio.Server: The running server.
+        """
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def _main(args):
+    server = GameServer(
+        args.max_sessions,
+        args.max_turns,
+        args.batch_delay,
+        args.seed,
+        args.session_timeout if args.session_timeout > 0 else None,
+    )
+    listener = await server.serve(args.host, args.port)
+    address = listener.sockets[0].getsockname()
+    print(f"Serving Mastermind on {address[0]}:{address[1]}")
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    """
+    Command-line entry point for the game server.
+    """
+    parser = argparse.ArgumentParser(description="Serve Mastermind games over TCP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-sessions", type=int, default=100000)
+    parser.add_argument("--max-turns", type=int, default=10)
+    parser.add_argument(
+        "--batch-delay",
+        type=float,
+        default=0.0,
+        help="seconds to wait for more guesses before scoring a batch",
+    )
+    parser.add_argument("--seed", type=int, help="seed for the hidden sequences")
+    parser.add_argument(
+        "--session-timeout",
+        type=float,
+        default=300.0,
+        help="seconds after which idle sessions are closed (0 keeps them open)",
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,471 @@
+import argparse
+import json
+import math
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from book import DecisionTree
+from codes import code_count, decode
+from feedback import FeedbackTable
+from game import Game
+from judge import CachedJudge, Judge
+from player import make_player
+from replay import ReplayWriter
+
+
+class SimulationReport:
+    """
+    Summarizes a batch of headless games.
+
+    Turn statistics are computed over the games that were won; lost games are only
+    counted in `games` and reflected in `win_rate`.
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        max_turns (int): Maximum number of turns allowed per game.
+        games (int): Number of games played.
+        histogram (Counter): Number of won games for each number of turns.
+        seconds (list): Wall-clock time of every game, in seconds.
+        judge_cache (Counter): Hits and misses of the judge caches, if any were used.
+    """
+
+    def __init__(self, n, k, max_turns):
+        self.n = n
+        self.k = k
+        self.max_turns = max_turns
+        self.games = 0
+        self.histogram = Counter()
+        self.seconds = []
+        self.judge_cache = Counter()
+
+    def add(self, turns, won, seconds):
+        """
+        Records the outcome of one game.
+
+        Args:
+            turns (int): Number of turns played.
+            won (bool): Whether the hidden sequence was found.
+            seconds (float): Wall-clock time of the game.
+        """
+        self.games += 1
+        if won:
+            self.histogram[turns] += 1
+        self.seconds.append(seconds)
+
+    def merge(self, other):
+        """
+        Adds the games of another report, e.g. one produced by a worker process.
+
+        Args:
+            other (SimulationReport): Report for the same (n, k, max_turns).
+        """
+        self.games += other.games
+        self.histogram.update(other.histogram)
+        self.seconds.extend(other.seconds)
+        self.judge_cache.update(other.judge_cache)
+
+    @property
+    def wins(self):
+        """int: Number of games won."""
+        return sum(self.histogram.values())
+
+    @property
+    def win_rate(self):
+        """float: Fraction of games won within `max_turns`."""
+        return self.wins / self.games if self.games else 0.0
+
+    @property
+    def mean_turns(self):
+        """float: Mean number of turns of the won games."""
+        if not self.wins:
+            return math.nan
+        return sum(t * c for t, c in self.histogram.items()) / self.wins
+
+    @property
+    def p95_turns(self):
+        """int: 95th percentile (nearest rank) of the turns of the won games."""
+        if not self.wins:
+            return math.nan
+        rank = math.ceil(0.95 * self.wins)
+        for turns in sorted(self.histogram):
+            rank -= self.histogram[turns]
+            if rank <= 0:
+                return turns
+
+    @property
+    def worst_turns(self):
+        """int: Largest number of turns of a won game."""
+        return max(self.histogram) if self.histogram else math.nan
+
+    @property
+    def mean_seconds(self):
+        """float: Mean wall-clock time per game, in seconds."""
+        return sum(self.seconds) / len(self.seconds) if self.seconds else math.nan
+
+    def as_dict(self):
+        """
+        Returns the report as plain data, suitable for JSON.
+
+        Returns:
+            dict: The report fields and statistics.
+        """
+        return {
+            "n": self.n,
+            "k": self.k,
+            "max_turns": self.max_turns,
+            "games": self.games,
+            "wins": self.wins,
+            "win_rate": self.win_rate,
+            "histogram": {str(t): self.histogram[t] for t in sorted(self.histogram)},
+            "mean_turns": self.mean_turns,
+            "p95_turns": self.p95_turns,
+            "max_turns_used": self.worst_turns,
+            "mean_seconds_per_game": self.mean_seconds,
+            "total_seconds": sum(self.seconds),
+            "judge_cache": dict(self.judge_cache),
+        }
+
+    def __str__(self):
+        lines = [
+            f"Games: {self.games} (n={self.n}, k={self.k}, max turns={self.max_turns})",
+            f"Win rate: {self.win_rate:.2%}",
+            f"Turns: mean {self.mean_turns:.3f}, p95 {self.p95_turns}, max {self.worst_turns}",
+            f"Time per game: {self.mean_seconds * 1000:.2f} ms",
+            "Turns histogram:",
+        ]
+        for turns in sorted(self.histogram):
+            lines.append(f"  {turns:3d}: {self.histogram[turns]}")
+        lookups = self.judge_cache["hits"] + self.judge_cache["misses"]
+        if lookups:
+            lines.append(
+                f"Judge cache: {self.judge_cache['hits']}/{lookups} hits"
+                f" ({self.judge_cache['hits'] / lookups:.2%})"
+            )
+        return "\n".join(lines)
+
+
+def play_game(n, k, hidden, player, max_turns=10, judge=Judge, log=None):
+    """
+    Plays one `game.Game` without any console interaction.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        hidden (list): The hidden sequence.
+        player: Object with `get_query(n, k)` and `receive_feedback(...)` methods.
+        max_turns (int, optional): Maximum number of turns. Defaults to 10.
+        judge (optional): Object with a `check(k, hidden, query, n)` method, such as a
+            `CachedJudge`. Defaults to `Judge`.
+        log (ReplayWriter, optional): Log the game is appended to, also when the
+            player fails.
+
+    Returns:
+        tuple: (turns, won) where turns is the number of queries made.
+    """
+    game = Game(n, k, hidden, player, max_turns, judge, log=log)
+    try:
+        while not game.over:
+            game.play_turn()
+    finally:
+        game.write_log()
+    return game.turns, game.status == "won"
+
+
+def hidden_indices(n, k, sample=None, seed=None):
+    """
+    Selects the hidden codes to play against.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        sample (int, optional): Number of codes to draw at random. Defaults to all codes.
+        seed (int, optional): Seed for the sample.
+
+    Returns:
+        list: Sorted packed codes (row indices into `codes.all_codes(n, k)`).
+    """
+    count = code_count(n, k)
+    if sample is None or sample >= count:
+        return list(range(count))
+    return sorted(random.Random(seed).sample(range(count), sample))
+
+
+def _run_shard(
+    n,
+    k,
+    player,
+    indices,
+    seed,
+    max_turns,
+    table,
+    book,
+    judge_cache=None,
+    share_judge_cache=True,
+    log=None,
+):
+    """
+    Plays one game per hidden code index and collects the results.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        player (str or callable): Player name or factory, as accepted by `simulate`.
+        indices (list): Row indices of the hidden codes.
+        seed (int or None): Base seed; each game is seeded from it and its hidden code.
+        max_turns (int): Maximum number of turns per game.
+        table (FeedbackTable or None): Precomputed feedback for solver players.
+        book (DecisionTree or None): Compiled moves for solver players.
+        judge_cache (int, optional): Capacity of a `CachedJudge` scoring the queries.
+        share_judge_cache (bool, optional): Keep one cache for all games of the shard
+            instead of starting every game with an empty one. Defaults to True.
+        log (ReplayWriter, optional): Log every game is appended to.
+
+    Returns:
+        SimulationReport: The results for these games.
+    """
+    if isinstance(player, str):
+        name = player
+        player = lambda: make_player(name, table, book)
+
+    report = SimulationReport(n, k, max_turns)
+    judge = Judge
+    if judge_cache is not None:
+        judge = CachedJudge(judge_cache)
+
+    for index in indices:
+        if seed is not None:
+            random.seed(seed * code_count(n, k) + index)
+        hidden = decode(index, n, k)
+        if judge_cache is not None and not share_judge_cache:
+            report.judge_cache.update(hits=judge.hits, misses=judge.misses)
+            judge = CachedJudge(judge_cache)
+
+        start = time.perf_counter()
+        turns, won = play_game(n, k, hidden, player(), max_turns, judge, log)
+        report.add(turns, won, time.perf_counter() - start)
+
+    if judge_cache is not None:
+        report.judge_cache.update(hits=judge.hits, misses=judge.misses)
+    return report
+
+
+# Feedback table and decision tree loaded once by each worker process
+_worker_table = None
+_worker_book = None
+
+
+def _init_worker(n, k, table_path, book_path):
+    """
+    Loads the shared feedback table and decision tree in a worker process.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        table_path (str or None): Path of the table file, or None to play without one.
+        book_path (str or None): Path of the tree file, or None to play without one.
+    """
+    global _worker_table, _worker_book
+    if table_path is not None:
+        _worker_table = FeedbackTable.load(n, k, os.path.dirname(table_path))
+    if book_path is not None:
+        _worker_book = DecisionTree.load(book_path)
+
+
+def _run_worker_shard(
+    n, k, player, indices, seed, max_turns, judge_cache, share_judge_cache
+):
+    """
+    Runs `_run_shard` in a worker process with the files loaded by `_init_worker`.
+    """
+    return _run_shard(
+        n,
+        k,
+        player,
+        indices,
+        seed,
+        max_turns,
+        _worker_table,
+        _worker_book,
+        judge_cache,
+        share_judge_cache,
+    )
+
+
+def simulate(
+    n,
+    k,
+    player="minimax",
+    sample=None,
+    seed=None,
+    max_turns=10,
+    table=None,
+    workers=1,
+    book=None,
+    judge_cache=None,
+    share_judge_cache=True,
+    log=None,
+):
+    """
+    Plays games against every hidden code, or a random sample, and reports turn counts.
+
+    Each game gets a fresh player seeded from `seed` and its hidden code, so with a
+    seed the results do not depend on the number of workers.
+
+    With more than one worker the hidden codes are split into shards played by a
+    process pool. Workers receive only the (n, k, player) spec and their shard, and
+    load the table and tree files instead of receiving a copy of them.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        player (str or callable, optional): Name accepted by `player.make_player`,
+            or a callable returning a new player. Defaults to "minimax".
+        sample (int, optional): Number of hidden codes to draw. Defaults to all codes.
+        seed (int, optional): Seed for the sample and the players' randomness.
+        max_turns (int, optional): Maximum number of turns per game. Defaults to 10.
+        table (FeedbackTable, optional): Precomputed feedback for solver players.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        book (DecisionTree, optional): Compiled moves for solver players.
+        judge_cache (int, optional): Score queries with a `CachedJudge` of this
+            capacity. Defaults to the uncached `Judge`.
+        share_judge_cache (bool, optional): Share the cache across the games of a
+            worker rather than clearing it for every game. Defaults to True.
+        log (ReplayWriter, optional): Log every game is appended to; only with one
+            worker.
+
+    Returns:
+        SimulationReport: The aggregated results.
+
+    Raises:
+        ValueError: If a table or tree that is not on disk, or a log, is combined with
+            several workers.
+    """
+    indices = hidden_indices(n, k, sample, seed)
+    if workers <= 1:
+        return _run_shard(
+            n,
+            k,
+            player,
+            indices,
+            seed,
+            max_turns,
+            table,
+            book,
+            judge_cache,
+            share_judge_cache,
+            log,
+        )
+
+    # Writers repair the end of the log when they open it, so one process owns it
+    if log is not None:
+        raise ValueError("Replay logs can only be written by a single worker")
+    if table is not None and table.path is None:
+        raise ValueError("Parallel simulations need a feedback table saved on disk")
+    if book is not None and book.path is None:
+        raise ValueError("Parallel simulations need a decision tree saved on disk")
+
+    # Several shards per worker keep the pool busy when games differ in cost
+    shards = [indices[i :: workers * 4] for i in range(workers * 4)]
+    report = SimulationReport(n, k, max_turns)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(
+            n,
+            k,
+            table.path if table is not None else None,
+            book.path if book is not None else None,
+        ),
+    ) as pool:
+        futures = [
+            pool.submit(
+                _run_worker_shard,
+                n,
+                k,
+                player,
+                shard,
+                seed,
+                max_turns,
+                judge_cache,
+                share_judge_cache,
+            )
+            for shard in shards
+            if shard
+        ]
+        for future in futures:
+            report.merge(future.result())
+
+    return report
+
+
+def main():
+    """
+    Command-line entry point for headless simulations.
+    """
+    parser = argparse.ArgumentParser(description="Run headless Mastermind games.")
+    parser.add_argument("-n", type=int, default=4, help="sequence length")
+    parser.add_argument("-k", type=int, default=6, help="number of colors")
+    parser.add_argument(
+        "--player", default="minimax", help='"random" or a strategy name'
+    )
+    parser.add_argument("--sample", type=int, help="number of hidden codes to draw")
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--max-turns", type=int, default=10)
+    parser.add_argument(
+        "--table", action="store_true", help="use the cached feedback table"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--book", action="store_true", help="use the cached decision tree"
+    )
+    parser.add_argument(
+        "--judge-cache", type=int, help="score queries through an LRU cache this size"
+    )
+    parser.add_argument(
+        "--no-shared-cache",
+        action="store_true",
+        help="start every game with an empty judge cache",
+    )
+    parser.add_argument("--log", help="append every game to this replay log")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+    if args.log and args.workers > 1:
+        parser.error("--log needs a single worker")
+
+    table = None
+    if args.table:
+        table = FeedbackTable.load_or_build(args.n, args.k, workers=args.workers)
+    book = DecisionTree.find(args.n, args.k, args.player) if args.book else None
+    log = ReplayWriter(args.log) if args.log else None
+    report = simulate(
+        args.n,
+        args.k,
+        args.player,
+        args.sample,
+        args.seed,
+        args.max_turns,
+        table,
+        args.workers,
+        book,
+        args.judge_cache,
+        not args.no_shared_cache,
+        log,
+    )
+    if log is not None:
+        log.close()
+
+    if args.json:
+        print(json.dumps(report.as_dict(), indent=2))
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import numpy as np
+
+import instrumentation
+from codes import decode_many
+from feedback import encode_feedback, outcome_count
+from judge import Judge
+
+# Number of (guess, survivor) pairs scored per batch by the partition engine
+BATCH_PAIRS = 1 << 20
+
+STRATEGIES = {}
+
+
+def register_strategy(name):
+    """
+    Registers a guess-selection heuristic under the given name.
+
+    A heuristic receives the (G, outcomes) array of partition sizes returned by
+    `partition_counts` and returns one score per guess; lower scores are better.
+
+    Args:
+        name (str): Name used to select the heuristic, e.g. in `get_strategy`.
+
+    Returns:
+        callable: A decorator that registers the function and returns it unchanged.
+    """
+
+    def decorator(function):
+        STRATEGIES[name] = function
+        return function
+
+    return decorator
+
+
+def get_strategy(name):
+    """
+    Looks up a registered heuristic.
+
+    Args:
+        name (str): Name of the heuristic.
+
+    Returns:
+        callable: The heuristic function.
+
+    Raises:
+        ValueError: If no heuristic is registered under that name.
+    """
+    try:
+        return STRATEGIES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unknown strategy {name!r}, choose one of {sorted(STRATEGIES)}"
+        ) from None
+
+
+def _as_codes(values, n, k):
+    # Arrays of colors are used as they are, packed codes are unpacked
+    values = np.asarray(values)
+    if values.ndim == 2:
+        return values
+    return decode_many(values, n, k)
+
+
+def partition_counts(n, k, guesses, survivors, table=None):
+    """
+    Counts, for every guess, how many survivors fall into each feedback outcome.
+
+    Feedback is looked up in `table` when one is given, otherwise it is computed
+    with `Judge.check_all` in batches of about `BATCH_PAIRS` pairs. Without a table,
+    guesses and survivors may also be given as (N, n) arrays of colors, for code
+    spaces whose packed codes do not fit into 64 bits.
+
+    Args:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        guesses (numpy.ndarray): Packed codes (row indices) of the guesses to score.
+        survivors (numpy.ndarray): Packed codes of the codes still consistent.
+        table (FeedbackTable, optional): Precomputed feedback for (n, k).
+
+    Returns:
+        numpy.ndarray: A (len(guesses), (n + 1) ** 2) array of partition sizes.
+    """
+    outcomes = outcome_count(n)
+    counts = np.empty((len(guesses), outcomes), dtype=np.int64)
+    survivor_codes = None
+    rows = max(1, BATCH_PAIRS // max(1, len(survivors)))
+
+    for start in range(0, len(guesses), rows):
+        chunk = guesses[start : start + rows]
+        if table is not None:
+            feedback = table.lookup(chunk, survivors)
+        else:
+            if survivor_codes is None:
+                survivor_codes = _as_codes(survivors, n, k)
+            exact, color = Judge.check_all(k, survivor_codes, _as_codes(chunk, n, k))
+            feedback = encode_feedback(n, exact, color).T
+
+        # Offset every row into its own block of bins so one bincount does all rows
+        offsets = np.arange(len(chunk), dtype=np.int64)[:, np.newaxis] * outcomes
+        counts[start : start + len(chunk)] = np.bincount(
+            (feedback + offsets).ravel(), minlength=len(chunk) * outcomes
+        ).reshape(len(chunk), outcomes)
+
+    instrumentation.count("candidates.scored", len(guesses) * len(survivors))
+    return counts
+
+
+@register_strategy("minimax")
+def minimax(counts):
+    """
+    Scores guesses by the size of their largest partition (Knuth).
+
+    Args:
+        counts (numpy.ndarray): Partition sizes from `partition_counts`.
+
+    Returns:
+        numpy.ndarray: The worst-case number of survivors per guess.
+    """
+    return counts.max(axis=1)
+
+
+@register_strategy("expected_size")
+def expected_size(counts):
+    """
+    Scores guesses by the expected number of survivors after the feedback.
+
+    Args:
+        counts (numpy.ndarray): Partition sizes from `partition_counts`.
+
+    Returns:
+        numpy.ndarray: The expected number of survivors per guess.
+    """
+    return (counts**2).sum(axis=1) / counts.sum(axis=1)
+
+
+@register_strategy("entropy")
+def entropy(counts):
+    """
+    Scores guesses by the information their feedback gives, as negated entropy.
+
+    Args:
+        counts (numpy.ndarray): Partition sizes from `partition_counts`.
+
+    Returns:
+        numpy.ndarray: Minus the entropy of the feedback distribution per guess.
+    """
+    p = counts / counts.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        terms = np.where(p > 0, p * np.log2(p), 0.0)
+    return terms.sum(axis=1)
+
+
+@register_strategy("most_parts")
+def most_parts(counts):
+    """
+    Scores guesses by the number of non-empty partitions, negated.
+
+    Args:
+        counts (numpy.ndarray): Partition sizes from `partition_counts`.
+
+    Returns:
+        numpy.ndarray: Minus the number of distinct feedback outcomes per guess.
+    """
+    return -(counts > 0).sum(axis=1)
+
+
+def best_guess(scores, guesses, survivors):
+    """
+    Picks the guess with the lowest score.
+
+    Ties are broken in favour of guesses that can still be the hidden sequence,
+    then by the lowest row index, so the choice is deterministic.
+
+    Args:
+        scores (numpy.ndarray): One score per guess, lower is better.
+        guesses (numpy.ndarray): Packed codes of the scored guesses.
+        survivors (numpy.ndarray): Packed codes of the codes still consistent.
+
+    Returns:
+        int: Packed code of the chosen guess.
+    """
+    is_survivor = np.isin(guesses, survivors)
+    return int(guesses[np.lexsort((guesses, ~is_survivor, scores))[0]])
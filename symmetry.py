@@ -0,0 +1,118 @@
+from math import factorial, prod
+
+import numpy as np
+
+from codes import all_codes, as_sequence
+
+
+class SymmetryTracker:
+    """
+    Tracks code symmetries that leave every query played so far unchanged.
+
+    A permutation of positions combined with a relabeling of colors that maps every
+    past query onto itself maps the set of codes consistent with the feedback onto
+    itself too, so guesses related by it split the candidates the same way and only
+    one of them needs to be scored.
+
+    The tracker keeps the subgroup generated by permuting positions that held the
+    same color in every query so far, and by relabeling colors that no query has
+    used yet. It is a subgroup of the full stabilizer, so the reduction is sound but
+    may be smaller than the largest possible one.
+
+    Attributes:
+        n (int): Length of the sequence.
+        k (int): Number of colors.
+        blocks (list): Groups of interchangeable positions.
+        free_colors (list): Colors not used by any query, all interchangeable.
+    """
+
+    def __init__(self, n, k, queries=()):
+        """
+        Initializes the tracker.
+
+        Args:
+            n (int): Length of the sequence.
+            k (int): Number of colors.
+            queries (iterable, optional): Queries already played, as sequences or packed codes.
+        """
+        self.n = n
+        self.k = k
+        self.blocks = [list(range(n))]
+        self.free_colors = list(range(1, k + 1))
+        for query in queries:
+            self.add_query(query)
+
+    def add_query(self, query):
+        """
+        Restricts the symmetries to those that leave the query unchanged.
+
+        Args:
+            query (list or int): The query played, as a sequence or a packed code.
+        """
+        query = as_sequence(query, self.n, self.k)
+
+        blocks = []
+        for block in self.blocks:
+            by_color = {}
+            for position in block:
+                by_color.setdefault(query[position], []).append(position)
+            blocks.extend(by_color.values())
+        self.blocks = sorted(blocks)
+
+        used = set(query)
+        self.free_colors = [color for color in self.free_colors if color not in used]
+
+    def group_order(self):
+        """
+        Returns the number of symmetries in the tracked group.
+
+        Returns:
+            int: The order of the group.
+        """
+        return prod(factorial(len(block)) for block in self.blocks) * factorial(
+            len(self.free_colors)
+        )
+
+    def representatives(self, guesses):
+        """
+        Keeps one guess from every class of equivalent guesses.
+
+        Two guesses are equivalent when they have the same color counts inside each
+        block of positions, up to relabeling the free colors. The lowest row index of
+        each class is kept, so choosing the best representative with the usual
+        tie-breaking gives the same guess as scoring every guess.
+
+        Args:
+            guesses (numpy.ndarray): Sorted row indices into `codes.all_codes(n, k)`.
+
+        Returns:
+            numpy.ndarray: Sorted row indices of the representatives.
+        """
+        if len(guesses) == 0:
+            return guesses
+
+        codes = all_codes(self.n, self.k)[guesses]
+        free = set(self.free_colors)
+        fixed_columns = []
+        free_columns = []
+
+        for color in range(1, self.k + 1):
+            matches = codes == color
+            counts = [matches[:, block].sum(axis=1) for block in self.blocks]
+            if color in free:
+                # Pack the per-block counts of a free color into a single number
+                signature = np.zeros(len(guesses), dtype=np.int64)
+                for count in counts:
+                    signature = signature * (self.n + 1) + count
+                free_columns.append(signature)
+            else:
+                fixed_columns.extend(counts)
+
+        columns = fixed_columns
+        if free_columns:
+            # Free colors are interchangeable, so only the multiset of signatures counts
+            columns = columns + list(np.sort(np.stack(free_columns, axis=1), axis=1).T)
+
+        keys = np.stack(columns, axis=1)
+        _, first = np.unique(keys, axis=0, return_index=True)
+        return guesses[np.sort(first)]
@@ -0,0 +1,81 @@
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from codes import all_codes
+from judge import CachedJudge, Judge
+
+
+def reference(hidden, query):
+    # Standard rules: every color scores min(occurrences in hidden, in query)
+    exact = sum(h == q for h, q in zip(hidden, query))
+    shared = sum((Counter(hidden) & Counter(query)).values())
+    return exact, shared - exact
+
+
+@pytest.mark.parametrize(
+    "hidden, query, expected",
+    [
+        ((1, 1, 2, 2), (1, 2, 1, 3), (1, 2)),
+        ((1, 2, 1, 3), (1, 1, 2, 2), (1, 2)),
+        ((1, 1, 1, 1), (1, 2, 3, 4), (1, 0)),
+        ((1, 2, 3, 4), (1, 1, 1, 1), (1, 0)),
+        ((2, 2, 2, 2), (1, 2, 2, 3), (2, 0)),
+        ((1, 1, 2, 2), (2, 2, 1, 1), (0, 4)),
+        ((1, 1, 2, 3), (3, 1, 1, 1), (1, 2)),
+        ((1, 2, 3, 4), (4, 3, 2, 1), (0, 4)),
+        ((5, 5, 6, 6), (5, 5, 6, 6), (4, 0)),
+    ],
+)
+def test_duplicate_colors(hidden, query, expected):
+    assert Judge.check(6, list(hidden), list(query)) == expected
+    assert reference(hidden, query) == expected
+
+
+def test_scalar_matches_batches():
+    n, k = 3, 4
+    codes = all_codes(n, k)
+    exact_all, color_all = Judge.check_all(k, codes, codes)
+
+    for i, hidden in enumerate(codes.tolist()):
+        exact, color = Judge.check_many(k, codes, hidden)
+        assert exact.tolist() == exact_all[:, i].tolist()
+        assert color.tolist() == color_all[:, i].tolist()
+        for j, query in enumerate(codes.tolist()):
+            expected = reference(hidden, query)
+            assert Judge.check(k, hidden, query) == expected
+            assert (exact_all[i, j], color_all[i, j]) == expected
+
+    exact, color = Judge.check_pairs(k, codes, codes[::-1])
+    for i, (hidden, query) in enumerate(zip(codes.tolist(), codes[::-1].tolist())):
+        assert (exact[i], color[i]) == reference(hidden, query)
+
+
+def test_packed_and_cached_match_sequences():
+    n, k = 4, 6
+    rng = np.random.default_rng(0)
+    judge = CachedJudge(64)
+    for hidden, query in rng.integers(0, k**n, size=(200, 2)).tolist():
+        expected = Judge.check(k, all_codes(n, k)[hidden], all_codes(n, k)[query])
+        assert Judge.check(k, hidden, query, n) == expected
+        assert judge.check(k, hidden, query, n) == expected
+
+
+def test_score_restores_counts():
+    counts = [0] * 7
+    assert Judge.score(6, [1, 1, 2, 2], [2, 1, 2, 6], counts) == (2, 1)
+    assert counts == [0] * 7
+
+    with pytest.raises(ValueError):
+        Judge.score(6, [1, 2, 7, 2], [2, 1, 2, 6], counts)
+    assert counts == [0] * 7
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        Judge.check(6, [1, 2, 3], [1, 2, 3, 4])
+    with pytest.raises(ValueError):
+        Judge.check(6, [1, 2, 3, 0], [1, 2, 3, 4])
+    with pytest.raises(ValueError):
+        Judge.check_many(6, [[1, 2, 3, 7]], [1, 2, 3, 4])
@@ -0,0 +1,105 @@
+import asyncio
+import json
+
+from server import GameServer
+
+
+async def request(reader, writer, message):
+    if not isinstance(message, bytes):
+        message = json.dumps(message).encode()
+    writer.write(message + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+def run(client):
+    # Serves on a free local port while `client` talks to it through a connection
+    async def main():
+        server = GameServer(seed=0)
+        listener = await server.serve("127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            await client(server, reader, writer)
+        finally:
+            writer.close()
+            listener.close()
+
+    asyncio.run(main())
+
+
+def test_malformed_session():
+    async def client(server, reader, writer):
+        started = await request(reader, writer, {"op": "new", "n": 4, "k": 6})
+        for session in ([1], {"id": 1}, "1", True):
+            response = await request(
+                reader, writer, {"op": "guess", "session": session, "query": [1] * 4}
+            )
+            assert "error" in response
+        response = await request(
+            reader,
+            writer,
+            {"op": "guess", "session": started["session"], "query": [1, 2, 3, 4]},
+        )
+        assert response["turn"] == 1
+
+    run(client)
+
+
+def test_malformed_lines():
+    async def client(server, reader, writer):
+        started = await request(reader, writer, {"op": "new", "n": 4, "k": 6})
+        assert await request(reader, writer, b"x" * 200000) == {
+            "error": "Request line too long"
+        }
+        assert await request(reader, writer, b"{") == {"error": "Invalid JSON"}
+        assert await request(reader, writer, b"[" * 50000) == {"error": "Invalid JSON"}
+        assert "error" in await request(reader, writer, b"[1]")
+        response = await request(
+            reader,
+            writer,
+            {"op": "guess", "session": started["session"], "query": [1, 2, 3, 4]},
+        )
+        assert response["turn"] == 1
+
+    run(client)
+
+
+def test_sessions_of_other_connections():
+    async def client(server, reader, writer):
+        started = await request(reader, writer, {"op": "new", "n": 4, "k": 6})
+        session = started["session"]
+        port = writer.get_extra_info("peername")[1]
+        other_reader, other_writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            for message in (
+                {"op": "guess", "session": session, "query": [1, 2, 3, 4]},
+                {"op": "close", "session": session},
+            ):
+                response = await request(other_reader, other_writer, message)
+                assert response == {"error": f"Unknown session: {session}"}
+        finally:
+            other_writer.close()
+        response = await request(
+            reader, writer, {"op": "guess", "session": session, "query": [1, 2, 3, 4]}
+        )
+        assert response["turn"] == 1
+
+    run(client)
+
+
+def test_boolean_colors():
+    async def client(server, reader, writer):
+        started = await request(
+            reader, writer, {"op": "new", "n": 4, "k": 6, "max_turns": True}
+        )
+        assert "error" in started
+        started = await request(reader, writer, {"op": "new", "n": 4, "k": 6})
+        response = await request(
+            reader,
+            writer,
+            {"op": "guess", "session": started["session"], "query": [1, 1, 2, True]},
+        )
+        assert response == {"error": "All numbers must be between 1 and 6"}
+
+    run(client)